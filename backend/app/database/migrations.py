@@ -0,0 +1,105 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+PERFORMANCE_TABLE = "district_performances"
+PERFORMANCE_KEY_INDEX = "ix_district_performances_district_month"
+SUMMARY_TABLE = "district_summary"
+
+
+def _month_as_date(connection: Connection) -> None:
+    """Convert the YYYY-MM month string to a date and add the (district_code, month) key."""
+    inspector = inspect(connection)
+    if not inspector.has_table(PERFORMANCE_TABLE):
+        return
+    columns = {c["name"]: c for c in inspector.get_columns(PERFORMANCE_TABLE)}
+    if "month" not in columns or "CHAR" not in str(columns["month"]["type"]).upper():
+        return
+
+    if connection.dialect.name == "sqlite":
+        _rebuild_sqlite_performance_table(connection, inspector)
+        return
+
+    # Keep the newest row of any duplicated (district, month) pair
+    connection.execute(text(
+        f"DELETE FROM {PERFORMANCE_TABLE} a USING {PERFORMANCE_TABLE} b "
+        "WHERE a.district_code = b.district_code AND a.month = b.month AND a.id < b.id"
+    ))
+    connection.execute(text(
+        f"DELETE FROM {PERFORMANCE_TABLE} WHERE district_code IS NULL OR month IS NULL"
+    ))
+    connection.execute(text(
+        f"ALTER TABLE {PERFORMANCE_TABLE} "
+        "ALTER COLUMN month TYPE DATE USING to_date(month, 'YYYY-MM'), "
+        "ALTER COLUMN month SET NOT NULL, "
+        "ALTER COLUMN district_code SET NOT NULL"
+    ))
+    connection.execute(text(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {PERFORMANCE_KEY_INDEX} "
+        f"ON {PERFORMANCE_TABLE} (district_code, month)"
+    ))
+
+
+def _rebuild_sqlite_performance_table(connection: Connection, inspector) -> None:
+    # SQLite cannot alter a column type, so copy into a freshly created table
+    from app.models.models import DistrictPerformance
+
+    old_table = f"{PERFORMANCE_TABLE}_old"
+    for index in inspector.get_indexes(PERFORMANCE_TABLE):
+        connection.execute(text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+    connection.execute(text(f"ALTER TABLE {PERFORMANCE_TABLE} RENAME TO {old_table}"))
+    DistrictPerformance.__table__.create(connection)
+
+    names = [c.name for c in DistrictPerformance.__table__.columns]
+    selected = ["date(month || '-01')" if name == "month" else name for name in names]
+    connection.execute(text(
+        f"INSERT INTO {PERFORMANCE_TABLE} ({', '.join(names)}) "
+        f"SELECT {', '.join(selected)} FROM {old_table} "
+        f"WHERE id IN (SELECT MAX(id) FROM {old_table} "
+        "WHERE district_code IS NOT NULL AND month IS NOT NULL "
+        "GROUP BY district_code, month)"
+    ))
+    connection.execute(text(f"DROP TABLE {old_table}"))
+
+
+def _district_summary(connection: Connection) -> None:
+    """Create district_summary and fill it from the rows already stored."""
+    if not inspect(connection).has_table(PERFORMANCE_TABLE):
+        # Fresh database: create_all makes the empty table
+        return
+    from app.models.models import DistrictSummary
+
+    DistrictSummary.__table__.create(connection, checkfirst=True)
+    rebuild_district_summary(connection)
+
+
+def rebuild_district_summary(connection: Connection) -> None:
+    """Recompute every district_summary row from district_performances."""
+    connection.execute(text(f"DELETE FROM {SUMMARY_TABLE}"))
+    connection.execute(text(
+        f"INSERT INTO {SUMMARY_TABLE} (district_code, months_count, total_households, "
+        "total_person_days, total_expenditure, work_completion_rate_sum) "
+        "SELECT district_code, COUNT(*), COALESCE(SUM(total_households), 0), "
+        "COALESCE(SUM(total_person_days), 0), COALESCE(SUM(total_expenditure), 0), "
+        "COALESCE(SUM(avg_work_completion_rate), 0) "
+        f"FROM {PERFORMANCE_TABLE} GROUP BY district_code"
+    ))
+
+
+MIGRATIONS = [
+    (1, _month_as_date),
+    (2, _district_summary),
+]
+
+
+def upgrade(connection: Connection) -> None:
+    """Apply pending migrations on a sync connection (`await conn.run_sync(upgrade)`)."""
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER PRIMARY KEY)"
+    ))
+    applied = {row[0] for row in connection.execute(text("SELECT version FROM schema_migrations"))}
+    for version, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        migrate(connection)
+        connection.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"),
+                           {"version": version})
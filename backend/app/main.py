@@ -1,11 +1,41 @@
-from fastapi import FastAPI, Query, HTTPException
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
-import json
-import random
-from datetime import datetime, timedelta
+from app.services.compression import CompressionMiddleware
+from app.services.encoding import COLUMNAR_FLOAT_PRECISION, JSON_RESPONSE_CLASS, check_response_format, to_columnar
+from app.services.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, cache_collector, metrics
+from app.services.export import EXPORT_MEDIA_TYPES, check_columns, check_format, check_month, encode_rows, export_headers, split_param
+from app.services.profiler import ProfilingMiddleware, profiles
+from app.services.performance_store import EXPORT_COLUMNS, PerformanceStore, month_labels
+from app.services.registry import DistrictRegistry
+from app.services.response_cache import ResponseCache
+from app.services.warmup import Readiness, warm_up
 
-app = FastAPI(title="MGNREGA Performance API", version="1.0.0")
+readiness = Readiness()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The store and registry are built at import (before the fork when
+    # preloaded); warm-up fills the response cache and loads what hot paths
+    # import. It runs once the worker is serving, and /health/ready answers
+    # 503 until it is done.
+    warming = asyncio.create_task(warm_up(app, readiness, warmup_paths()))
+    rolling = asyncio.create_task(keep_months_current())
+    yield
+    readiness.stopping = True
+    readiness.ready = False
+    for task in (warming, rolling):
+        task.cancel()
+    await asyncio.gather(warming, rolling, return_exceptions=True)
+    if _sync_scheduler is not None:
+        await _sync_scheduler.stop()
+
+app = FastAPI(title="MGNREGA Performance API", version="1.0.0", default_response_class=JSON_RESPONSE_CLASS,
+              lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,7 +43,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id"],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(CompressionMiddleware)
+# Outermost, so response sizes are measured after compression
+app.add_middleware(MetricsMiddleware)
 
 # Mock data
 districts = [
@@ -38,62 +73,53 @@ states = [
     {"state_code": "KA", "state_name": "Karnataka"},
 ]
 
+registry = DistrictRegistry(districts, states)
+performance_store = PerformanceStore.build(registry.districts)
+response_cache = ResponseCache()
+metrics.add_collector(cache_collector("responses", response_cache))
+
+# How often a worker checks whether a new month has closed
+MONTH_CHECK_SECONDS = 3600
+_roll_lock = threading.Lock()
+
+def roll_months() -> bool:
+    """Rebuild the store once a new month has closed; returns whether it did.
+
+    The store is built when the app is imported (in the gunicorn master when
+    preloaded), so a long-running worker would otherwise keep serving the
+    window of the month it started in.
+    """
+    global performance_store
+    with _roll_lock:
+        if performance_store.months[-1:] == month_labels(1):
+            return False
+        performance_store = PerformanceStore.build(registry.districts, len(performance_store.months))
+    response_cache.clear()
+    return True
+
+async def keep_months_current():
+    while True:
+        await asyncio.sleep(MONTH_CHECK_SECONDS)
+        await asyncio.to_thread(roll_months)
+
 def generate_performance_data(district_code: str, months: int = 12):
-    data = []
-    base_date = datetime.now() - timedelta(days=30 * months)
-    for i in range(months):
-        month_date = base_date + timedelta(days=30 * i)
-        person_days = random.randint(50000, 200000)
-        households = random.randint(5000, 25000)
-        works_completed = random.randint(100, 500)
-        works_takenup = works_completed + random.randint(20, 100)
-        women_days = int(person_days * random.uniform(0.4, 0.6))
-        sc_days = int(person_days * random.uniform(0.15, 0.25))
-        st_days = int(person_days * random.uniform(0.05, 0.15))
-        
-        data.append({
-            "id": i + 1,
-            "district_code": district_code,
-            "month": month_date.strftime("%Y-%m"),
-            "total_households_issued_jobcards": households,
-            "person_days_generated": person_days,
-            "total_expenditure": random.uniform(1000000, 5000000),
-            "avg_work_completion_rate": random.uniform(60, 95),
-            "total_works_completed": works_completed,
-            "total_works_takenup": works_takenup,
-            "work_completion_rate": (works_completed / works_takenup) * 100,
-            "avg_days_per_household": person_days / households,
-            "women_persondays": women_days,
-            "sc_persondays": sc_days,
-            "st_persondays": st_days,
-            "state_name": next(d["state_name"] for d in districts if d["district_code"] == district_code)
-        })
-    return data
+    return performance_store.district_rows(district_code, months)
 
 def generate_state_data(state_name: str, months: int = 12):
-    state_districts = [d for d in districts if d["state_name"] == state_name]
-    aggregated_data = []
-    
-    for i in range(months):
-        month_date = (datetime.now() - timedelta(days=30 * months)) + timedelta(days=30 * i)
-        total_households = sum(random.randint(5000, 25000) for _ in state_districts)
-        total_person_days = sum(random.randint(50000, 200000) for _ in state_districts)
-        total_expenditure = sum(random.uniform(1000000, 5000000) for _ in state_districts)
-        total_works_completed = sum(random.randint(100, 500) for _ in state_districts)
-        total_works_takenup = sum(random.randint(120, 600) for _ in state_districts)
-        
-        aggregated_data.append({
-            "month": month_date.strftime("%Y-%m"),
-            "state_name": state_name,
-            "total_households": total_households,
-            "total_person_days": total_person_days,
-            "total_expenditure": total_expenditure,
-            "total_works_completed": total_works_completed,
-            "total_works_takenup": total_works_takenup,
-            "work_completion_rate": (total_works_completed / total_works_takenup) * 100,
-            "districts_count": len(state_districts)
-        })
-    return aggregated_data
+    return performance_store.state_rows(state_name, months)
+
+def warmup_paths() -> List[str]:
+    codes = ",".join(d["district_code"] for d in registry.districts[:4])
+    first = registry.districts[0]["district_code"] if registry.districts else ""
+    return [
+        "/api/states",
+        "/api/districts",
+        "/api/performance/summary",
+        "/api/rankings",
+        f"/api/districts/{first}/performance",
+        f"/api/districts/{first}/latest",
+        f"/api/compare?district_codes={codes}&months=6",
+    ]
 
 @app.post("/auth/register")
 def register(user_data: dict):
@@ -104,108 +130,260 @@ def login(credentials: dict):
     return {"success": True, "user": {"email": credentials.get("email")}, "access_token": "mock-token"}
 
 @app.get("/api/states")
-def get_states():
-    return states
+def get_states(request: Request):
+    return response_cache.respond(request, ("states",), lambda: registry.states)
 
 @app.get("/api/districts")
-def get_districts():
-    return districts
+def get_districts(request: Request):
+    return response_cache.respond(request, ("districts",), lambda: registry.districts)
 
 @app.get("/api/districts/{district_code}")
-def get_district(district_code: str):
-    district = next((d for d in districts if d["district_code"] == district_code), None)
+def get_district(district_code: str, request: Request):
+    district = registry.district(district_code)
     if not district:
         raise HTTPException(status_code=404, detail="District not found")
-    return district
+    return response_cache.respond(request, ("district", district_code), lambda: district)
 
 @app.get("/api/districts/{district_code}/performance")
-def get_district_performance(district_code: str, months: int = 12):
-    valid_codes = [d["district_code"] for d in districts]
-    if district_code not in valid_codes:
+def get_district_performance(district_code: str, request: Request, months: int = 12):
+    if district_code not in registry:
         raise HTTPException(status_code=404, detail="District not found")
-    return generate_performance_data(district_code, months)
+    return response_cache.respond(
+        request, ("performance", district_code, months),
+        lambda: generate_performance_data(district_code, months),
+        tags=[f"district:{district_code}"],
+    )
 
 @app.get("/api/districts/{district_code}/latest")
-def get_latest_performance(district_code: str):
-    valid_codes = [d["district_code"] for d in districts]
-    if district_code not in valid_codes:
+def get_latest_performance(district_code: str, request: Request):
+    if district_code not in registry:
+        raise HTTPException(status_code=404, detail="District not found")
+
+    def build():
+        data = generate_performance_data(district_code, 1)
+        return data[0] if data else {}
+
+    return response_cache.respond(request, ("latest", district_code), build,
+                                  tags=[f"district:{district_code}"])
+
+@app.get("/api/districts/{district_code}/trends")
+def get_district_trends(
+    district_code: str,
+    request: Request,
+    metrics: str = Query(None, description="Comma-separated metrics"),
+    months: int = Query(12, ge=1, le=120),
+    window: int = Query(3, ge=1, le=24, description="Rolling average window in months"),
+):
+    from app.services.analytics import check_metrics, district_trends
+
+    if district_code not in registry:
         raise HTTPException(status_code=404, detail="District not found")
-    data = generate_performance_data(district_code, 1)
-    return data[0] if data else {}
+    selected = check_metrics(split_param(metrics))
+    return response_cache.respond(
+        request, ("trends", district_code, tuple(selected), months, window),
+        lambda: district_trends(performance_store, district_code, selected, months, window),
+        tags=[f"district:{district_code}"],
+    )
+
+@app.get("/api/rankings")
+def get_rankings(
+    request: Request,
+    metric: str = Query("person_days_generated"),
+    state: str = Query(None, description="Rank within one state"),
+    month: str = Query(None, description="YYYY-MM, latest by default"),
+    order: str = Query("top", description="top or bottom"),
+    limit: int = Query(10, ge=1, le=1000),
+):
+    from app.services.analytics import check_metrics, check_order, rankings
+
+    check_metrics([metric])
+    check_order(order)
+    if state and registry.invalid_states([state]):
+        raise HTTPException(status_code=404, detail=f"Invalid state names: {state}")
+    month = check_month(month) or performance_store.months[-1]
+    if month not in performance_store.months:
+        raise HTTPException(status_code=404, detail=f"No performance data for {month}")
+    return response_cache.respond(
+        request, ("rankings", metric, state, month, order, limit),
+        lambda: rankings(performance_store, registry, metric, month, state, order, limit),
+        tags=["rankings"],
+    )
 
 @app.get("/api/performance/summary")
-def get_performance_summary():
-    summary = []
-    for district in districts:
-        code = district["district_code"]
-        summary.append({
-            "district_code": code,
+def get_performance_summary(request: Request):
+    return response_cache.respond(request, ("summary",), build_performance_summary, tags=["summary"])
+
+def build_performance_summary():
+    return [
+        {
+            "district_code": district["district_code"],
             "district_name": district["district_name"],
-            "total_households": random.randint(50000, 250000),
-            "total_person_days": random.randint(500000, 2000000),
-            "total_expenditure": random.uniform(10000000, 50000000),
-            "avg_work_completion_rate": random.uniform(60, 95)
-        })
-    return summary
+            **performance_store.district_summary(district["district_code"]),
+        }
+        for district in registry.districts
+    ]
 
 @app.get("/api/compare")
-def compare_districts(district_codes: str = Query(..., description="Comma-separated district codes"), months: int = Query(6, ge=1, le=24)):
+def compare_districts(request: Request, district_codes: str = Query(..., description="Comma-separated district codes"), months: int = Query(6, ge=1, le=24),
+                      format: str = Query("rows", description="rows or columnar"),
+                      precision: int = Query(COLUMNAR_FLOAT_PRECISION, ge=0, le=10, description="Float decimals in columnar format")):
+    check_response_format(format)
     codes = [code.strip().upper() for code in district_codes.split(',')]
     
     if len(codes) < 2:
         raise HTTPException(status_code=400, detail="At least 2 district codes required for comparison")
     
-    valid_codes = [d["district_code"] for d in districts]
-    invalid_codes = [code for code in codes if code not in valid_codes]
+    invalid_codes = registry.invalid_codes(codes)
     
     if invalid_codes:
         raise HTTPException(status_code=404, detail=f"Invalid district codes: {', '.join(invalid_codes)}")
     
     # Return data in format expected by React app
-    comparison_data = {}
-    for code in codes:
-        comparison_data[code] = generate_performance_data(code, months)
-    
-    return comparison_data
+    def build():
+        if format == "columnar":
+            return to_columnar([row for code in codes for row in generate_performance_data(code, months)], precision)
+        return {code: generate_performance_data(code, months) for code in codes}
+
+    # The rows body is an object keyed by code, so request order does not matter
+    # there; columnar rows follow the requested order
+    ordered = tuple(codes) if format == "columnar" else tuple(sorted(set(codes)))
+    key = ("compare", ordered, months, format, precision if format == "columnar" else None)
+    return response_cache.respond(request, key, build,
+                                  tags=[f"district:{code}" for code in codes])
 
 @app.get("/api/states/compare")
-def compare_states(state_names: str = Query(..., description="Comma-separated state names"), months: int = Query(6, ge=1, le=24)):
+def compare_states(request: Request, state_names: str = Query(..., description="Comma-separated state names"), months: int = Query(6, ge=1, le=24),
+                   format: str = Query("rows", description="rows or columnar"),
+                   precision: int = Query(COLUMNAR_FLOAT_PRECISION, ge=0, le=10, description="Float decimals in columnar format")):
+    check_response_format(format)
     names = [name.strip() for name in state_names.split(',')]
     
     if len(names) < 2:
         raise HTTPException(status_code=400, detail="At least 2 state names required for comparison")
     
-    valid_states = [s["state_name"] for s in states]
-    invalid_states = [name for name in names if name not in valid_states]
+    invalid_states = registry.invalid_states(names)
     
     if invalid_states:
         raise HTTPException(status_code=404, detail=f"Invalid state names: {', '.join(invalid_states)}")
     
-    comparison_data = {}
-    for state_name in names:
-        state_info = next(s for s in states if s["state_name"] == state_name)
-        comparison_data[state_name] = {
-            "state_info": state_info,
-            "performance_data": generate_state_data(state_name, months)
+    def build():
+        if format == "columnar":
+            rows = [row for state_name in names for row in generate_state_data(state_name, months)]
+            return {
+                "states": names,
+                "comparison_period_months": months,
+                "state_info": {state_name: registry.state(state_name) for state_name in names},
+                **to_columnar(rows, precision),
+            }
+        comparison_data = {}
+        for state_name in names:
+            comparison_data[state_name] = {
+                "state_info": registry.state(state_name),
+                "performance_data": generate_state_data(state_name, months)
+            }
+        return {
+            "states": names,
+            "comparison_period_months": months,
+            "data": comparison_data
         }
-    
-    return {
-        "states": names,
-        "comparison_period_months": months,
-        "data": comparison_data
-    }
-
-@app.post("/api/sync/{district_code}")
-def trigger_sync(district_code: str, months: int = 12):
-    valid_codes = [d["district_code"] for d in districts]
-    if district_code not in valid_codes:
+
+    key = ("states_compare", tuple(names), months, format, precision if format == "columnar" else None)
+    return response_cache.respond(request, key, build,
+                                  tags=[f"state:{name}" for name in names])
+
+@app.get("/api/export/performance")
+def export_performance(
+    format: str = Query("ndjson", description="ndjson or csv"),
+    states: str = Query(None, description="Comma-separated state names"),
+    districts: str = Query(None, description="Comma-separated district codes"),
+    start_month: str = Query(None, description="First month, YYYY-MM"),
+    end_month: str = Query(None, description="Last month, YYYY-MM"),
+    columns: str = Query(None, description="Comma-separated columns"),
+):
+    fmt = check_format(format)
+    selected = check_columns(split_param(columns), EXPORT_COLUMNS)
+    state_names = split_param(states)
+    codes = [code.upper() for code in split_param(districts)]
+
+    invalid_states = registry.invalid_states(state_names)
+    if invalid_states:
+        raise HTTPException(status_code=404, detail=f"Invalid state names: {', '.join(invalid_states)}")
+    invalid_codes = registry.invalid_codes(codes)
+    if invalid_codes:
+        raise HTTPException(status_code=404, detail=f"Invalid district codes: {', '.join(invalid_codes)}")
+
+    if not codes:
+        codes = [d["district_code"] for d in registry.districts]
+    if state_names:
+        codes = [code for code in codes if registry.district(code)["state_name"] in state_names]
+
+    rows = performance_store.iter_rows(codes, check_month(start_month), check_month(end_month), selected)
+    return StreamingResponse(encode_rows(rows, selected, fmt), media_type=EXPORT_MEDIA_TYPES[fmt],
+                             headers=export_headers(fmt))
+
+async def sync_district(district_code: str, months: int):
+    # Mock feed: refresh the district's rows in the store
+    await asyncio.to_thread(roll_months)
+    updated = performance_store.regenerate([district_code], months)
+    district = registry.district(district_code)
+    response_cache.invalidate(f"district:{district_code}", f"state:{district['state_name']}", "summary",
+                            "rankings")
+    return 0, updated
+
+_sync_scheduler = None
+
+def get_sync_scheduler():
+    # Created on first use; most workers never sync
+    global _sync_scheduler
+    if _sync_scheduler is None:
+        from app.services.sync import SyncScheduler
+        _sync_scheduler = SyncScheduler(sync_district)
+    return _sync_scheduler
+
+@app.post("/api/sync", status_code=202)
+async def trigger_sync_all(months: int = 12):
+    job = get_sync_scheduler().submit_all([d["district_code"] for d in registry.districts], months)
+    return {"message": f"Sync queued for {len(registry)} districts", **job.to_dict()}
+
+@app.post("/api/sync/{district_code}", status_code=202)
+async def trigger_sync(district_code: str, months: int = 12):
+    if district_code not in registry:
         raise HTTPException(status_code=404, detail="District not found")
-    return {"message": f"Sync triggered for {district_code}", "status": "success"}
+    job = get_sync_scheduler().submit(district_code, months)
+    return {"message": f"Sync triggered for {district_code}", **job.to_dict()}
+
+@app.get("/api/sync/jobs/{job_id}")
+def get_sync_job(job_id: str):
+    job = get_sync_scheduler().status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job
 
 @app.get("/")
 def root():
     return {"message": "MGNREGA Performance API"}
 
+@app.get("/metrics")
+def get_metrics():
+    return Response(metrics.render(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+@app.get("/debug/profiles")
+def list_profiles():
+    return profiles.list()
+
+@app.get("/debug/profiles/{profile_id}")
+def get_profile(profile_id: str, format: str = Query("report", description="report or collapsed")):
+    profile = profiles.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed() if format == "collapsed" else profile.report())
+
 @app.get("/health")
+@app.get("/health/live")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/ready")
+def readiness_check():
+    # 503 until warm-up has finished and again once shutdown starts
+    return JSON_RESPONSE_CLASS(readiness.to_dict(), status_code=200 if readiness.ready else 503)
\ No newline at end of file
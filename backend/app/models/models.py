@@ -1,7 +1,14 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, Float, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database.database import Base
-from datetime import datetime
+from datetime import date, datetime
+
+def parse_month(value) -> date:
+    """Normalise a YYYY-MM string (or any date) to the first day of that month."""
+    if isinstance(value, date):
+        return value.replace(day=1)
+    year, month = str(value)[:7].split("-")
+    return date(int(year), int(month), 1)
 
 class User(Base):
     __tablename__ = "users"
@@ -26,10 +33,13 @@ class District(Base):
 
 class DistrictPerformance(Base):
     __tablename__ = "district_performances"
+    __table_args__ = (
+        Index("ix_district_performances_district_month", "district_code", "month", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    district_code = Column(String, ForeignKey("districts.district_code"))
-    month = Column(String)  # Format: YYYY-MM
+    district_code = Column(String, ForeignKey("districts.district_code"), nullable=False)
+    month = Column(Date, nullable=False)  # First day of the month
     total_households = Column(Integer, default=0)
     total_person_days = Column(Integer, default=0)
     total_expenditure = Column(Float, default=0.0)
@@ -37,4 +47,15 @@ class DistrictPerformance(Base):
     works_completed = Column(Integer, default=0)
     works_ongoing = Column(Integer, default=0)
     
-    district = relationship("District", back_populates="performances")
\ No newline at end of file
+    district = relationship("District", back_populates="performances")
+
+class DistrictSummary(Base):
+    """Running totals over every stored month of a district, kept in step by bulk_upsert_performance."""
+    __tablename__ = "district_summary"
+
+    district_code = Column(String, ForeignKey("districts.district_code"), primary_key=True)
+    months_count = Column(Integer, nullable=False, default=0)
+    total_households = Column(BigInteger, nullable=False, default=0)
+    total_person_days = Column(BigInteger, nullable=False, default=0)
+    total_expenditure = Column(Float, nullable=False, default=0.0)
+    work_completion_rate_sum = Column(Float, nullable=False, default=0.0)
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime
+from pydantic import BaseModel, field_validator
+from typing import Dict, List, Optional
+from datetime import date, datetime
 
 class UserCreate(BaseModel):
     email: str
@@ -45,6 +45,13 @@ class PerformanceBase(BaseModel):
     works_completed: int = 0
     works_ongoing: int = 0
 
+    @field_validator("month", mode="before")
+    @classmethod
+    def format_month(cls, value):
+        if isinstance(value, date):
+            return value.strftime("%Y-%m")
+        return value
+
 class Performance(PerformanceBase):
     id: int
     
@@ -59,6 +66,5 @@ class DistrictSummary(BaseModel):
     total_expenditure: float
     avg_work_completion_rate: float
 
-class CompareResponse(BaseModel):
-    districts: List[str]
-    data: List[Performance]
\ No newline at end of file
+# Per-district rows, oldest month first, keyed by district code
+CompareResponse = Dict[str, List[Performance]]
\ No newline at end of file
@@ -1,18 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.database import get_db
 from app.models import models, schemas
-from app.services.auth import verify_password, get_password_hash, create_access_token
+from app.services.auth import (create_access_token, get_current_user, get_password_hash_async, login_throttle,
+                               verify_password_async)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).filter(models.User.email == email))
+    return result.scalars().first()
+
 @router.post("/register")
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await get_user_by_email(db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    
-    hashed_password = get_password_hash(user.password)
+
+    hashed_password = await get_password_hash_async(user.password)
     db_user = models.User(
         email=user.email,
         name=user.name,
@@ -21,17 +27,30 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
+    await db.commit()
+    await db.refresh(db_user)
+
     access_token = create_access_token(data={"sub": user.email})
-    return {"success": True, "user": db_user, "access_token": access_token}
+    return {"success": True, "user": schemas.User.model_validate(db_user), "access_token": access_token}
 
 @router.post("/login")
-def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+async def login(user: schemas.UserLogin, db: AsyncSession = Depends(get_db)):
+    # Locked-out emails are turned away before the lookup and the bcrypt check
+    retry_after = login_throttle.retry_after(user.email)
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many failed login attempts",
+                            headers={"Retry-After": str(int(retry_after) + 1)})
+
+    db_user = await get_user_by_email(db, user.email)
+    if not db_user or not await verify_password_async(user.password, db_user.hashed_password):
+        login_throttle.record_failure(user.email)
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    
+    login_throttle.reset(user.email)
+
     access_token = create_access_token(data={"sub": user.email})
-    return {"success": True, "user": db_user, "access_token": access_token}
\ No newline at end of file
+    return {"success": True, "user": schemas.User.model_validate(db_user), "access_token": access_token}
+
+
+@router.get("/me")
+async def read_current_user(claims: dict = Depends(get_current_user)):
+    return {"email": claims["sub"], "expires_at": claims.get("exp")}
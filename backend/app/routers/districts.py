@@ -1,74 +1,203 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database.database import get_db
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from app.database.database import AsyncSessionLocal, get_db
 from app.models import models, schemas
+from app.services.archive import fill_from_archive
+from app.services.ingest import bulk_upsert_performance
+from app.services.registry import DistrictRegistry
+from app.services.single_flight import SingleFlight
+from app.services.sync import SyncScheduler, source_from_env
 from typing import List, Optional
 
-router = APIRouter(prefix="/api", tags=["districts"])
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await sync_scheduler.stop()
+    await sync_source.close()
+
+# The lifespan merges into the including app's, so sync workers and connections close with it
+router = APIRouter(prefix="/api", tags=["districts"], lifespan=lifespan)
+
+# Districts seeded by another process show up once the loaded registry is this old
+REGISTRY_TTL_SECONDS = float(os.getenv("REGISTRY_TTL_SECONDS", "60"))
+
+_registry: Optional[DistrictRegistry] = None
+_registry_loaded_at = 0.0
+
+async def load_registry(db: AsyncSession) -> DistrictRegistry:
+    global _registry, _registry_loaded_at
+    result = await db.execute(select(models.District))
+    registry = DistrictRegistry({
+        "id": d.id,
+        "district_code": d.district_code,
+        "district_name": d.district_name,
+        "state": d.state,
+        "state_name": d.state,
+    } for d in result.scalars())
+    # Swapped in whole; requests already holding the old one keep a consistent view
+    _registry, _registry_loaded_at = registry, time.monotonic()
+    return registry
+
+async def reload_registry() -> DistrictRegistry:
+    async with AsyncSessionLocal() as db:
+        return await load_registry(db)
+
+async def get_registry() -> DistrictRegistry:
+    if _registry is None or time.monotonic() - _registry_loaded_at > REGISTRY_TTL_SECONDS:
+        return await flight.ado(("registry",), reload_registry)
+    return _registry
+
+sync_source = source_from_env()
+
+async def sync_district(district_code: str, months: int):
+    rows = await sync_source.fetch(district_code, months)
+    async with AsyncSessionLocal() as db:
+        result = await bulk_upsert_performance(db, rows)
+    return result.inserted, result.updated
+
+sync_scheduler = SyncScheduler(sync_district)
+
+# Dashboards refreshing together share one query per distinct request
+flight = SingleFlight()
 
 @router.get("/districts", response_model=List[schemas.District])
-def get_districts(db: Session = Depends(get_db)):
-    return db.query(models.District).all()
+async def get_districts(registry: DistrictRegistry = Depends(get_registry)):
+    return registry.districts
 
 @router.get("/districts/{district_code}", response_model=schemas.District)
-def get_district(district_code: str, db: Session = Depends(get_db)):
-    district = db.query(models.District).filter(models.District.district_code == district_code).first()
+async def get_district(district_code: str, registry: DistrictRegistry = Depends(get_registry)):
+    district = registry.district(district_code)
     if not district:
         raise HTTPException(status_code=404, detail="District not found")
     return district
 
 @router.get("/districts/{district_code}/performance", response_model=List[schemas.Performance])
-def get_district_performance(district_code: str, months: int = 12, db: Session = Depends(get_db)):
-    performances = db.query(models.DistrictPerformance)\
-        .filter(models.DistrictPerformance.district_code == district_code)\
-        .order_by(models.DistrictPerformance.month.desc())\
-        .limit(months).all()
-    return performances
+async def get_district_performance(district_code: str, months: int = 12, db: AsyncSession = Depends(get_db),
+                                   registry: DistrictRegistry = Depends(get_registry)):
+    if district_code not in registry:
+        raise HTTPException(status_code=404, detail="District not found")
+    result = await db.execute(
+        select(models.DistrictPerformance)
+        .filter(models.DistrictPerformance.district_code == district_code)
+        .order_by(models.DistrictPerformance.month.desc())
+        .limit(months)
+    )
+    rows = result.scalars().all()
+    if len(rows) < months:
+        # Older months may have been moved to the Parquet archive
+        filled = await fill_from_archive({district_code: rows[::-1]}, months,
+                                         [registry.district(district_code)["state_name"]])
+        rows = filled[district_code][::-1]
+    return rows
 
 @router.get("/districts/{district_code}/latest", response_model=schemas.Performance)
-def get_latest_performance(district_code: str, db: Session = Depends(get_db)):
-    performance = db.query(models.DistrictPerformance)\
-        .filter(models.DistrictPerformance.district_code == district_code)\
-        .order_by(models.DistrictPerformance.month.desc())\
-        .first()
+async def get_latest_performance(district_code: str, db: AsyncSession = Depends(get_db),
+                                 registry: DistrictRegistry = Depends(get_registry)):
+    if district_code not in registry:
+        raise HTTPException(status_code=404, detail="District not found")
+    result = await db.execute(
+        select(models.DistrictPerformance)
+        .filter(models.DistrictPerformance.district_code == district_code)
+        .order_by(models.DistrictPerformance.month.desc())
+        .limit(1)
+    )
+    performance = result.scalars().first()
     if not performance:
         raise HTTPException(status_code=404, detail="No performance data found")
     return performance
 
 @router.get("/performance/summary", response_model=List[schemas.DistrictSummary])
-def get_performance_summary(db: Session = Depends(get_db)):
-    results = db.query(
-        models.District.district_code,
-        models.District.district_name,
-        func.sum(models.DistrictPerformance.total_households).label('total_households'),
-        func.sum(models.DistrictPerformance.total_person_days).label('total_person_days'),
-        func.sum(models.DistrictPerformance.total_expenditure).label('total_expenditure'),
-        func.avg(models.DistrictPerformance.avg_work_completion_rate).label('avg_work_completion_rate')
-    ).join(models.DistrictPerformance)\
-     .group_by(models.District.district_code, models.District.district_name)\
-     .all()
-    
+async def get_performance_summary():
+    return await flight.ado(("summary",), load_performance_summary)
+
+async def load_performance_summary():
+    # Running totals kept by bulk_upsert_performance; no scan of the monthly rows.
+    # Own session: the result is shared by every request that joined the flight
+    summary = models.DistrictSummary
+    async with AsyncSessionLocal() as db:
+        results = await db.execute(
+            select(
+                models.District.district_code,
+                models.District.district_name,
+                summary.months_count,
+                summary.total_households,
+                summary.total_person_days,
+                summary.total_expenditure,
+                summary.work_completion_rate_sum,
+            ).join(summary, summary.district_code == models.District.district_code)
+        )
+
     return [schemas.DistrictSummary(
         district_code=r.district_code,
         district_name=r.district_name,
-        total_households=r.total_households or 0,
-        total_person_days=r.total_person_days or 0,
-        total_expenditure=r.total_expenditure or 0.0,
-        avg_work_completion_rate=r.avg_work_completion_rate or 0.0
+        total_households=r.total_households,
+        total_person_days=r.total_person_days,
+        total_expenditure=r.total_expenditure,
+        avg_work_completion_rate=r.work_completion_rate_sum / r.months_count if r.months_count else 0.0
     ) for r in results]
 
-@router.get("/compare")
-def compare_districts(district_codes: str, months: int = 6, db: Session = Depends(get_db)):
-    codes = district_codes.split(',')
-    performances = db.query(models.DistrictPerformance)\
-        .filter(models.DistrictPerformance.district_code.in_(codes))\
-        .order_by(models.DistrictPerformance.month.desc())\
-        .limit(months * len(codes)).all()
-    
-    return {"districts": codes, "data": performances}
-
-@router.post("/sync/{district_code}")
-def trigger_sync(district_code: str, months: int = 12, db: Session = Depends(get_db)):
-    # Mock sync operation - in real app, this would fetch from external API
-    return {"message": f"Sync triggered for {district_code}", "status": "success"}
\ No newline at end of file
+@router.get("/compare", response_model=schemas.CompareResponse)
+async def compare_districts(district_codes: str = Query(..., description="Comma-separated district codes"),
+                            months: int = Query(6, ge=1, le=24),
+                            registry: DistrictRegistry = Depends(get_registry)):
+    codes = [code.strip().upper() for code in district_codes.split(',')]
+    if len(codes) < 2:
+        raise HTTPException(status_code=400, detail="At least 2 district codes required for comparison")
+    invalid_codes = registry.invalid_codes(codes)
+    if invalid_codes:
+        raise HTTPException(status_code=404, detail=f"Invalid district codes: {', '.join(invalid_codes)}")
+
+    codes = sorted(set(codes))
+    states = sorted({registry.district(code)["state_name"] for code in codes})
+    return await flight.ado(("compare", tuple(codes), months), lambda: load_compare(codes, months, states))
+
+async def load_compare(codes: List[str], months: int, states: List[str]):
+    # Last `months` rows of every district in one round trip; the window walks
+    # the (district_code, month) index instead of sorting the whole IN list
+    performance = models.DistrictPerformance
+    ranked = (
+        select(
+            performance.id,
+            func.row_number().over(
+                partition_by=performance.district_code,
+                order_by=performance.month.desc(),
+            ).label("rn"),
+        )
+        .filter(performance.district_code.in_(codes))
+        .subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(performance)
+            .join(ranked, ranked.c.id == performance.id)
+            .filter(ranked.c.rn <= months)
+            .order_by(performance.district_code, performance.month)
+        )
+        data = {code: [] for code in codes}
+        for row in result.scalars():
+            data[row.district_code].append(row)
+    return await fill_from_archive(data, months, states)
+
+@router.post("/sync", status_code=202)
+async def trigger_sync_all(months: int = 12, registry: DistrictRegistry = Depends(get_registry)):
+    job = sync_scheduler.submit_all([d["district_code"] for d in registry.districts], months)
+    return {"message": f"Sync queued for {len(registry)} districts", **job.to_dict()}
+
+@router.post("/sync/{district_code}", status_code=202)
+async def trigger_sync(district_code: str, months: int = 12,
+                       registry: DistrictRegistry = Depends(get_registry)):
+    if district_code not in registry:
+        raise HTTPException(status_code=404, detail="District not found")
+    job = sync_scheduler.submit(district_code, months)
+    return {"message": f"Sync triggered for {district_code}", **job.to_dict()}
+
+@router.get("/sync/jobs/{job_id}")
+async def get_sync_job(job_id: str):
+    job = sync_scheduler.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job
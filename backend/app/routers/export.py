@@ -0,0 +1,89 @@
+import asyncio
+from itertools import islice
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from app.database.database import AsyncSessionLocal
+from app.models import models
+from app.services.archive import get_archive
+from app.services.export import (
+    EXPORT_MEDIA_TYPES, aencode_rows, check_columns, check_format, check_month, export_headers, split_param,
+)
+from app.services.ingest import PERFORMANCE_METRICS
+
+router = APIRouter(prefix="/api", tags=["export"])
+
+EXPORT_COLUMNS = ("district_code", "state", "month") + PERFORMANCE_METRICS
+EXPORT_BATCH_ROWS = 1000
+
+def export_query(columns, states, codes, start_month, end_month):
+    performance = models.DistrictPerformance
+    selected = [models.District.state if name == "state" else getattr(performance, name) for name in columns]
+    query = select(*selected).select_from(performance)
+    if "state" in columns or states:
+        query = query.join(models.District, models.District.district_code == performance.district_code)
+    if states:
+        query = query.filter(models.District.state.in_(states))
+    if codes:
+        query = query.filter(performance.district_code.in_(codes))
+    if start_month:
+        query = query.filter(performance.month >= models.parse_month(start_month))
+    if end_month:
+        query = query.filter(performance.month <= models.parse_month(end_month))
+    # Walks the (district_code, month) index instead of sorting the result
+    return query.order_by(performance.district_code, performance.month)
+
+async def stored_months(keys):
+    """The (district_code, YYYY-MM) keys among `keys` that the database also holds."""
+    performance = models.DistrictPerformance.__table__
+    key = tuple_(performance.c.district_code, performance.c.month)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(performance.c.district_code, performance.c.month)
+            .where(key.in_([(code, models.parse_month(month)) for code, month in keys]))
+        )
+        return {(code, month.strftime("%Y-%m")) for code, month in result}
+
+async def stream_archived_rows(columns, states, codes, start_month, end_month):
+    archive = get_archive()
+    if archive is None:
+        return
+    read_columns = list(dict.fromkeys(list(columns) + ["district_code", "month"]))
+    rows = archive.iter_rows(read_columns, district_codes=codes, states=states,
+                             start_month=start_month, end_month=end_month)
+    while batch := await asyncio.to_thread(list, islice(rows, EXPORT_BATCH_ROWS)):
+        # A month re-ingested (or not yet deleted) after archiving is exported from the database
+        stored = await stored_months({(row["district_code"], row["month"]) for row in batch})
+        for row in batch:
+            if (row["district_code"], row["month"]) not in stored:
+                yield {name: row[name] for name in columns}
+
+async def stream_rows(query, archived=None):
+    # Archived (older) months first, then the database
+    if archived is not None:
+        async for row in archived:
+            yield row
+    # The session lives as long as the response body, not the request handler
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_ROWS))
+        async for row in result.mappings():
+            yield row
+
+@router.get("/export/performance")
+async def export_performance(
+    format: str = Query("ndjson", description="ndjson or csv"),
+    states: str = Query(None, description="Comma-separated state names"),
+    districts: str = Query(None, description="Comma-separated district codes"),
+    start_month: str = Query(None, description="First month, YYYY-MM"),
+    end_month: str = Query(None, description="Last month, YYYY-MM"),
+    columns: str = Query(None, description="Comma-separated columns"),
+):
+    fmt = check_format(format)
+    selected = check_columns(split_param(columns), EXPORT_COLUMNS)
+    state_names = split_param(states)
+    codes = [code.upper() for code in split_param(districts)]
+    start_month, end_month = check_month(start_month), check_month(end_month)
+    query = export_query(selected, state_names, codes, start_month, end_month)
+    archived = stream_archived_rows(selected, state_names, codes, start_month, end_month)
+    return StreamingResponse(aencode_rows(stream_rows(query, archived), selected, fmt),
+                             media_type=EXPORT_MEDIA_TYPES[fmt], headers=export_headers(fmt))
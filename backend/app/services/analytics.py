@@ -0,0 +1,138 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.services.performance_store import METRICS, PerformanceStore
+from app.services.registry import DistrictRegistry
+
+RANKING_ORDERS = ("top", "bottom")
+
+
+def check_metrics(requested: List[str]) -> List[str]:
+    if not requested:
+        return list(METRICS)
+    invalid = [name for name in requested if name not in METRICS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid metrics: {', '.join(invalid)}")
+    return requested
+
+
+def check_order(order: str) -> str:
+    if order not in RANKING_ORDERS:
+        raise HTTPException(status_code=400, detail=f"Invalid order: {order} (use top or bottom)")
+    return order
+
+
+def _json_values(values: np.ndarray) -> list:
+    # encode_json refuses NaN; gaps go out as null
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def changes(values: np.ndarray, lag: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Absolute and percent change against `lag` months earlier, along the last axis."""
+    change = np.full_like(values, np.nan)
+    percent = np.full_like(values, np.nan)
+    if lag < values.shape[-1]:
+        before = values[..., :-lag]
+        change[..., lag:] = values[..., lag:] - before
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent[..., lag:] = np.where(before != 0, change[..., lag:] / np.abs(before) * 100, np.nan)
+    return change, percent
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` months; NaN until a full window of stored months is available."""
+    result = np.full_like(values, np.nan)
+    if window <= values.shape[-1]:
+        result[..., window - 1:] = sliding_window_view(values, window, axis=-1).mean(axis=-1)
+    return result
+
+
+def percentile_ranks(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Percentile (ties share the midpoint) and rank (1 = highest) of each value among `values`."""
+    ordered = np.sort(values)
+    below = np.searchsorted(ordered, values, side="left")
+    at_or_below = np.searchsorted(ordered, values, side="right")
+    percentile = (below + 0.5 * (at_or_below - below)) / len(values) * 100
+    return percentile, len(values) - at_or_below + 1
+
+
+def district_trends(store: PerformanceStore, district_code: str, metrics: Sequence[str],
+                    months: int = 12, window: int = 3) -> dict:
+    """Month-over-month and year-over-year changes plus a rolling mean, one column per series.
+
+    Changes are taken over the whole stored history before slicing, so the
+    first returned months still have their earlier comparison points.
+    """
+    values = store.district_values(district_code, metrics)
+    mom_change, mom_percent = changes(values, 1)
+    yoy_change, yoy_percent = changes(values, 12)
+    rolling = rolling_mean(values, window)
+    start = max(0, len(store.months) - months)
+
+    series = {}
+    for i, name in enumerate(metrics):
+        series[name] = {
+            "value": _json_values(values[i, start:]),
+            "mom_change": _json_values(mom_change[i, start:]),
+            "mom_percent": _json_values(mom_percent[i, start:]),
+            "yoy_change": _json_values(yoy_change[i, start:]),
+            "yoy_percent": _json_values(yoy_percent[i, start:]),
+            "rolling_avg": _json_values(rolling[i, start:]),
+        }
+    return {
+        "district_code": district_code,
+        "months": store.months[start:],
+        "window": window,
+        "metrics": series,
+    }
+
+
+def rankings(store: PerformanceStore, registry: DistrictRegistry, metric: str, month: str,
+             state_name: Optional[str] = None, order: str = "top", limit: int = 10) -> dict:
+    """Top or bottom districts for one metric and month, with state and national percentiles."""
+    values = store.month_values(metric, month)
+    stored = ~np.isnan(values)
+    state_names = np.array(store.state_names)
+    states, state_of = np.unique(state_names, return_inverse=True)
+
+    national_percentile = np.full_like(values, np.nan)
+    national_rank = np.zeros(len(values), dtype=np.int64)
+    rows = np.flatnonzero(stored)
+    if len(rows):
+        national_percentile[rows], national_rank[rows] = percentile_ranks(values[rows])
+
+    state_percentile = np.full_like(values, np.nan)
+    state_rank = np.zeros(len(values), dtype=np.int64)
+    for state in range(len(states)):
+        rows = np.flatnonzero(stored & (state_of == state))
+        if len(rows):
+            state_percentile[rows], state_rank[rows] = percentile_ranks(values[rows])
+
+    candidates = stored if state_name is None else stored & (state_names == state_name)
+    rows = np.flatnonzero(candidates)
+    # Stable sort keeps store order among equal values
+    rows = rows[np.argsort(-values[rows] if order == "top" else values[rows], kind="stable")][:limit]
+
+    return {
+        "metric": metric,
+        "month": month,
+        "state_name": state_name,
+        "order": order,
+        "districts_ranked": int(candidates.sum()),
+        "districts": [
+            {
+                "district_code": store.district_codes[row],
+                "district_name": registry.district(store.district_codes[row])["district_name"],
+                "state_name": store.state_names[row],
+                "value": float(values[row]),
+                "state_rank": int(state_rank[row]),
+                "state_percentile": float(state_percentile[row]),
+                "national_rank": int(national_rank[row]),
+                "national_percentile": float(national_percentile[row]),
+            }
+            for row in rows
+        ],
+    }
@@ -0,0 +1,264 @@
+import asyncio
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+from urllib.parse import quote
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import models
+from app.services.ingest import PERFORMANCE_METRICS
+from app.services.performance_store import FLOAT_METRICS, month_labels
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:  # optional: the archive tier is off without it
+    pa = None
+
+# Empty disables the archive; reads then only see the database
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "")
+ARCHIVE_KEEP_MONTHS = int(os.getenv("ARCHIVE_KEEP_MONTHS", "24"))
+ARCHIVE_ROW_GROUP_ROWS = int(os.getenv("ARCHIVE_ROW_GROUP_ROWS", "64000"))
+ARCHIVE_BATCH_ROWS = 1000
+
+PARTITION_KEYS = ("state", "month")
+# Replaced after every partition write; dataset discovery skips names starting with "_"
+VERSION_FILE = "_version"
+FILE_COLUMNS = ("id", "district_code") + PERFORMANCE_METRICS
+
+
+def _month_label(value) -> str:
+    return value.strftime("%Y-%m") if isinstance(value, date) else str(value)[:7]
+
+
+class PerformanceArchive:
+    """Closed months of district_performances as Parquet files.
+
+    Laid out as `<root>/state=<name>/month=<YYYY-MM>/part-0.parquet`, rows
+    sorted by district_code, so a read prunes partitions on state and month
+    and skips row groups on district_code. Files are memory-mapped. The file
+    list is rediscovered whenever any process has written a partition since.
+    """
+
+    def __init__(self, root: str):
+        if pa is None:
+            raise RuntimeError("The performance archive needs pyarrow (pip install pyarrow)")
+        self.root = Path(root)
+        self.file_schema = pa.schema(
+            [("id", pa.int64()), ("district_code", pa.string())]
+            + [(name, pa.float64() if name in FLOAT_METRICS else pa.int64()) for name in PERFORMANCE_METRICS]
+        )
+        self.partitioning = ds.partitioning(pa.schema([(key, pa.string()) for key in PARTITION_KEYS]),
+                                            flavor="hive")
+        self._dataset = None
+        self._dataset_version = None
+        self._lock = threading.Lock()
+
+    def write_partition(self, state: str, month: str, rows: List[dict]) -> None:
+        """Merge rows into one (state, month) partition; a district already stored there is replaced."""
+        directory = self.root / f"state={quote(state, safe='')}" / f"month={month}"
+        path = directory / "part-0.parquet"
+        table = pa.Table.from_pylist([{name: row.get(name) for name in FILE_COLUMNS} for row in rows],
+                                     schema=self.file_schema)
+        if path.exists():
+            existing = pq.read_table(path, schema=self.file_schema)
+            replaced = pc.is_in(existing["district_code"], value_set=table["district_code"])
+            table = pa.concat_tables([existing.filter(pc.invert(replaced)), table])
+        table = table.sort_by("district_code")
+
+        directory.mkdir(parents=True, exist_ok=True)
+        # Readers only ever see a complete file
+        staging = path.with_suffix(".tmp")
+        pq.write_table(table, staging, row_group_size=ARCHIVE_ROW_GROUP_ROWS)
+        os.replace(staging, path)
+        self._bump_version()
+
+    def _bump_version(self) -> None:
+        version = self.root / VERSION_FILE
+        staging = version.with_suffix(f".{os.getpid()}.tmp")
+        staging.write_text(str(time.time_ns()))
+        # A new inode every time, so readers in other processes see a change
+        os.replace(staging, version)
+
+    def _version(self):
+        try:
+            stat = (self.root / VERSION_FILE).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def dataset(self):
+        version = self._version()
+        with self._lock:
+            if (self._dataset is None or version != self._dataset_version) and self.root.is_dir():
+                self._dataset = ds.dataset(str(self.root), format="parquet", partitioning=self.partitioning,
+                                           filesystem=fs.LocalFileSystem(use_mmap=True),
+                                           exclude_invalid_files=True)
+                self._dataset_version = version
+            return self._dataset
+
+    @staticmethod
+    def _filter(district_codes: Sequence[str] = (), states: Sequence[str] = (),
+                start_month: Optional[str] = None, end_month: Optional[str] = None,
+                before_month: Optional[str] = None):
+        conditions = []
+        if district_codes:
+            conditions.append(ds.field("district_code").isin(list(district_codes)))
+        if states:
+            conditions.append(ds.field("state").isin(list(states)))
+        if start_month:
+            conditions.append(ds.field("month") >= start_month)
+        if end_month:
+            conditions.append(ds.field("month") <= end_month)
+        if before_month:
+            conditions.append(ds.field("month") < before_month)
+        condition = None
+        for term in conditions:
+            condition = term if condition is None else condition & term
+        return condition
+
+    def read(self, columns: Optional[Sequence[str]] = None, **filters):
+        """Archived rows as an Arrow table, filtered before any file is decoded.
+
+        Filters are `district_codes`, `states` and months as YYYY-MM:
+        `start_month`, `end_month` (inclusive) and `before_month` (exclusive).
+        The result is held in memory; keep it to a few districts.
+        """
+        dataset = self.dataset()
+        if dataset is None:
+            return pa.table({name: pa.array([], type=self.file_schema.field(name).type) for name in FILE_COLUMNS}
+                            | {key: pa.array([], type=pa.string()) for key in PARTITION_KEYS})
+        return dataset.to_table(columns=list(columns) if columns else None, filter=self._filter(**filters))
+
+    def iter_rows(self, columns: Sequence[str], **filters) -> Iterator[dict]:
+        """Rows taking the filters of `read`, streamed one batch at a time.
+
+        Partitions are read one after another in (month, state) order, each
+        already sorted by district_code, so memory stays at one batch.
+        """
+        dataset = self.dataset()
+        if dataset is None:
+            return
+        condition = self._filter(**filters)
+        fragments = sorted(dataset.get_fragments(filter=condition),
+                           key=lambda fragment: self._partition(fragment))
+        for fragment in fragments:
+            for batch in fragment.to_batches(schema=dataset.schema, columns=list(columns), filter=condition,
+                                             batch_size=ARCHIVE_BATCH_ROWS):
+                yield from batch.to_pylist()
+
+    @staticmethod
+    def _partition(fragment) -> tuple:
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        return keys.get("month", ""), keys.get("state", "")
+
+    def latest(self, needed: Dict[str, int], before: Dict[str, Optional[str]],
+               states: Sequence[str] = ()) -> Dict[str, List[dict]]:
+        """The newest `needed[code]` archived rows of each district older than `before[code]`, oldest first."""
+        bounds = [month for month in before.values() if month]
+        before_month = max(bounds) if len(bounds) == len(before) else None
+        table = self.read(district_codes=list(needed), states=states, before_month=before_month,
+                          columns=list(FILE_COLUMNS) + ["month"])
+
+        by_district = defaultdict(list)
+        for row in table.to_pylist():
+            limit = before.get(row["district_code"])
+            if limit is None or row["month"] < limit:
+                by_district[row["district_code"]].append(row)
+        result = {}
+        for code, count in needed.items():
+            rows = sorted(by_district.get(code, []), key=lambda row: row["month"])
+            result[code] = rows[-count:] if count > 0 else []
+        return result
+
+
+_archive: Optional[PerformanceArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> Optional[PerformanceArchive]:
+    """The archive configured by ARCHIVE_DIR, or None when it is disabled."""
+    global _archive
+    if not ARCHIVE_DIR:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = PerformanceArchive(ARCHIVE_DIR)
+        return _archive
+
+
+async def fill_from_archive(rows: Dict[str, list], months: int,
+                            states: Sequence[str] = ()) -> Dict[str, list]:
+    """Prepend archived months to districts whose database rows (oldest first) fall short of `months`."""
+    archive = get_archive()
+    needed = {code: months - len(found) for code, found in rows.items() if len(found) < months}
+    if archive is None or not needed:
+        return rows
+    before = {code: _month_label(rows[code][0].month) if rows[code] else None for code in needed}
+    archived = await asyncio.to_thread(archive.latest, needed, before, states)
+    return {code: archived.get(code, []) + list(found) for code, found in rows.items()}
+
+
+async def archived_rows(keys: Sequence[tuple]) -> Dict[tuple, dict]:
+    """Archived rows for (district_code, month date) keys, keyed the same way."""
+    archive = get_archive()
+    if archive is None or not keys:
+        return {}
+    labels = sorted({_month_label(month) for _, month in keys})
+    table = await asyncio.to_thread(archive.read, columns=list(FILE_COLUMNS) + ["month"],
+                                    district_codes=sorted({code for code, _ in keys}),
+                                    start_month=labels[0], end_month=labels[-1])
+    wanted = set(keys)
+    found = {}
+    for row in table.to_pylist():
+        key = (row["district_code"], models.parse_month(row["month"]))
+        if key in wanted:
+            found[key] = row
+    return found
+
+
+async def archive_closed_months(db: AsyncSession, archive: PerformanceArchive,
+                                keep_months: int = ARCHIVE_KEEP_MONTHS) -> int:
+    """Move every month older than the last `keep_months` from the database into the archive.
+
+    One month per transaction: its partitions are written first and the
+    rows deleted after, so a crash in between leaves them in both places
+    (the export skips archived rows the database also holds, and
+    fill_from_archive only adds months older than the database's) and the
+    next run rewrites the same files. Returns the number of rows moved.
+    """
+    performance = models.DistrictPerformance.__table__
+    districts = models.District.__table__
+    cutoff = models.parse_month(month_labels(keep_months)[0])
+    months = await db.execute(
+        select(performance.c.month).distinct().where(performance.c.month < cutoff).order_by(performance.c.month)
+    )
+
+    moved = 0
+    for (month,) in months.all():
+        result = await db.execute(
+            select(func.coalesce(districts.c.state, "unknown").label("state"),
+                   *(performance.c[name] for name in FILE_COLUMNS))
+            .select_from(performance.outerjoin(districts, districts.c.district_code == performance.c.district_code))
+            .where(performance.c.month == month)
+        )
+        by_state = defaultdict(list)
+        for row in result.mappings():
+            by_state[row["state"]].append(dict(row))
+        label = _month_label(month)
+        for state, rows in by_state.items():
+            await asyncio.to_thread(archive.write_partition, state, label, rows)
+
+        deleted = await db.execute(delete(performance).where(performance.c.month == month))
+        await db.commit()
+        moved += deleted.rowcount
+    return moved
@@ -0,0 +1,54 @@
+import json
+import os
+from typing import Any, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+RESPONSE_FORMATS = ("rows", "columnar")
+COLUMNAR_FLOAT_PRECISION = int(os.getenv("COLUMNAR_FLOAT_PRECISION", "2"))
+
+
+def encode_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    # Same settings as fastapi's JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class EncodedJSONResponse(JSONResponse):
+    """JSONResponse rendered by encode_json, so handlers and cached bodies share one encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+JSON_RESPONSE_CLASS = EncodedJSONResponse
+
+
+def check_response_format(fmt: str) -> str:
+    if fmt not in RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format: {fmt} (use rows or columnar)")
+    return fmt
+
+
+def to_columnar(rows: List[dict], precision: Optional[int] = COLUMNAR_FLOAT_PRECISION) -> dict:
+    """Turn row dicts into `{"columns": [...], "data": {column: [values]}}`.
+
+    Key names are sent once instead of per row, and float columns are
+    rounded to `precision` decimals (None keeps full precision).
+    """
+    columns = list(rows[0]) if rows else []
+    data = {}
+    for name in columns:
+        values = [row.get(name) for row in rows]
+        if precision is not None:
+            values = [round(value, precision) if isinstance(value, float) else value for value in values]
+        data[name] = values
+    return {"columns": columns, "data": data}
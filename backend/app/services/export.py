@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterable, Iterable, Iterator, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+# Rows are flushed to the client in chunks of roughly this many bytes
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def split_param(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def check_format(fmt: str) -> str:
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Invalid export format: {fmt} (use ndjson or csv)")
+    return fmt
+
+
+def check_columns(requested: List[str], available: Sequence[str]) -> List[str]:
+    if not requested:
+        return list(available)
+    invalid = [name for name in requested if name not in available]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid columns: {', '.join(invalid)}")
+    return requested
+
+
+def check_month(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    try:
+        datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid month: {value} (use YYYY-MM)")
+    return value
+
+
+def export_headers(fmt: str, name: str = "performance") -> dict:
+    return {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+
+
+def _value(value):
+    if isinstance(value, date):
+        return value.strftime("%Y-%m")
+    return value
+
+
+class _Encoder:
+    def __init__(self, columns: List[str], fmt: str):
+        self.columns = columns
+        self.fmt = fmt
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, lineterminator="\n") if fmt == "csv" else None
+        if self.writer:
+            self.writer.writerow(columns)
+
+    def add(self, row) -> Optional[bytes]:
+        values = [_value(row[name]) for name in self.columns]
+        if self.writer:
+            self.writer.writerow(values)
+        else:
+            self.buffer.write(json.dumps(dict(zip(self.columns, values)), separators=(",", ":")))
+            self.buffer.write("\n")
+        if self.buffer.tell() >= EXPORT_CHUNK_BYTES:
+            return self.flush()
+        return None
+
+    def flush(self) -> bytes:
+        chunk = self.buffer.getvalue().encode("utf-8")
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
+
+
+def encode_rows(rows: Iterable, columns: List[str], fmt: str) -> Iterator[bytes]:
+    """Encode mapping rows as NDJSON or CSV, yielding bounded byte chunks."""
+    encoder = _Encoder(columns, fmt)
+    for row in rows:
+        chunk = encoder.add(row)
+        if chunk:
+            yield chunk
+    tail = encoder.flush()
+    if tail:
+        yield tail
+
+
+async def aencode_rows(rows: AsyncIterable, columns: List[str], fmt: str):
+    encoder = _Encoder(columns, fmt)
+    async for row in rows:
+        chunk = encoder.add(row)
+        if chunk:
+            yield chunk
+    tail = encoder.flush()
+    if tail:
+        yield tail
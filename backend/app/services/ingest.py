@@ -0,0 +1,189 @@
+import os
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+from sqlalchemy import false, func, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import models
+from app.services.performance_store import month_labels
+from app.services.synthetic import SyntheticGenerator
+
+PERFORMANCE_KEY = ("district_code", "month")
+PERFORMANCE_METRICS = (
+    "total_households",
+    "total_person_days",
+    "total_expenditure",
+    "avg_work_completion_rate",
+    "works_completed",
+    "works_ongoing",
+)
+# district_summary column -> performance metric it sums
+SUMMARY_SOURCES = {
+    "total_households": "total_households",
+    "total_person_days": "total_person_days",
+    "total_expenditure": "total_expenditure",
+    "work_completion_rate_sum": "avg_work_completion_rate",
+}
+SUMMARY_COLUMNS = ("months_count",) + tuple(SUMMARY_SOURCES)
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "500"))
+
+_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+@dataclass
+class IngestResult:
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated
+
+
+def _dialect_insert(db: AsyncSession):
+    dialect = db.bind.dialect.name
+    if dialect not in _INSERTS:
+        raise NotImplementedError(f"Bulk upsert is not supported for the {dialect} dialect")
+    return _INSERTS[dialect]
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _normalize(chunk: List[dict]) -> List[dict]:
+    # Later rows win when a chunk repeats a key; ON CONFLICT cannot touch a row twice
+    by_key = {}
+    for row in chunk:
+        record = {name: row[name] for name in PERFORMANCE_METRICS if name in row}
+        record["district_code"] = row["district_code"]
+        record["month"] = models.parse_month(row["month"])
+        by_key[(record["district_code"], record["month"])] = record
+    return list(by_key.values())
+
+
+def _group_by_columns(records: List[dict]) -> dict:
+    # A multi-row VALUES clause needs the same columns in every row
+    groups = {}
+    for record in records:
+        columns = tuple(name for name in PERFORMANCE_METRICS if name in record)
+        groups.setdefault(columns, []).append(record)
+    return groups
+
+
+def _summary_deltas(records: List[dict], stored: dict) -> Dict[str, dict]:
+    """Change in each district's summary totals when `records` replace the `stored` rows."""
+    deltas = {}
+    for record in records:
+        old = stored.get((record["district_code"], record["month"]))
+        delta = deltas.setdefault(record["district_code"], dict.fromkeys(SUMMARY_COLUMNS, 0))
+        if old is None:
+            delta["months_count"] += 1
+        for column, metric in SUMMARY_SOURCES.items():
+            before = (old[metric] or 0) if old is not None else 0
+            delta[column] += (record.get(metric, before) or 0) - before
+    return deltas
+
+
+async def _apply_summary_deltas(db: AsyncSession, insert, deltas: Dict[str, dict]) -> None:
+    table = models.DistrictSummary.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["district_code"],
+        set_={name: table.c[name] + stmt.excluded[name] for name in SUMMARY_COLUMNS},
+    )
+    await db.execute(stmt, [dict(delta, district_code=code) for code, delta in deltas.items()])
+
+
+async def _lock_districts(db: AsyncSession, district_codes: Iterable[str]) -> None:
+    """Serialize writers of the same districts until the transaction ends.
+
+    The summary deltas are computed from rows read before the upsert, so two
+    writers of one district must not both read the pre-upsert rows.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        # Sorted, so writers of overlapping chunks take the locks in one order
+        for code in sorted(set(district_codes)):
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(code))))
+    elif dialect == "sqlite":
+        # SQLite locks the whole database; a write takes its write lock now rather than at the upsert
+        table = models.DistrictSummary.__table__
+        await db.execute(update(table).where(false()).values(months_count=table.c.months_count))
+
+
+async def bulk_upsert_performance(db: AsyncSession, rows: Iterable[dict],
+                                  chunk_size: int = INGEST_CHUNK_SIZE) -> IngestResult:
+    """Insert or update monthly performance rows, one transaction per chunk.
+
+    Rows are dicts with `district_code`, `month` (date or YYYY-MM) and any of
+    the metric columns; metrics left out of a row keep their stored value.
+    The district_summary totals are adjusted in the same transaction, with
+    archived months counted as already stored.
+    """
+    insert = _dialect_insert(db)
+    table = models.DistrictPerformance.__table__
+    key = tuple_(table.c.district_code, table.c.month)
+    result = IngestResult()
+
+    for chunk in _chunks(rows, chunk_size):
+        records = _normalize(chunk)
+        keys = [(r["district_code"], r["month"]) for r in records]
+        await _lock_districts(db, (code for code, _ in keys))
+        existing = await db.execute(
+            select(table.c.district_code, table.c.month, *(table.c[m] for m in SUMMARY_SOURCES.values()))
+            .where(key.in_(keys))
+        )
+        stored = {(row["district_code"], row["month"]): row for row in existing.mappings()}
+        updated = len(stored)
+        # An archived month is still in district_summary; re-ingesting it replaces it there
+        missing = [k for k in keys if k not in stored]
+        if missing:
+            from app.services.archive import archived_rows
+
+            stored.update(await archived_rows(missing))
+
+        for columns, group in _group_by_columns(records).items():
+            stmt = insert(table)
+            if columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(PERFORMANCE_KEY),
+                    set_={name: stmt.excluded[name] for name in columns},
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=list(PERFORMANCE_KEY))
+            await db.execute(stmt, group)
+        await _apply_summary_deltas(db, insert, _summary_deltas(records, stored))
+        await db.commit()
+
+        result.updated += updated
+        result.inserted += len(records) - updated
+    return result
+
+
+async def ensure_districts(db: AsyncSession, districts: Iterable[dict]) -> int:
+    """Insert any districts whose code is not stored yet; returns how many were added."""
+    rows = [dict(d) for d in districts]
+    if not rows:
+        return 0
+    table = models.District.__table__
+    before = await db.execute(select(table.c.district_code).where(
+        table.c.district_code.in_([r["district_code"] for r in rows])))
+    known = {code for (code,) in before}
+    stmt = _dialect_insert(db)(table).values(rows).on_conflict_do_nothing(index_elements=["district_code"])
+    await db.execute(stmt)
+    await db.commit()
+    return len({r["district_code"] for r in rows} - known)
+
+
+def mock_performance_rows(district_codes: Iterable[str], months: int = 12) -> Iterator[dict]:
+    """Synthetic monthly rows standing in for the external MGNREGA feed."""
+    return SyntheticGenerator().iter_rows(list(district_codes), month_labels(months))
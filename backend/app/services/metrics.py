@@ -0,0 +1,233 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    # %g keeps six significant digits, which freezes large counters between scrapes
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, Labels, float]]]] = []
+
+    def describe(self, name: str, help_text: str, buckets: Optional[Iterable[float]] = None) -> None:
+        self._help[name] = help_text
+        if buckets is not None:
+            self._buckets[name] = tuple(buckets)
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + value
+
+    def add_gauge(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+            histogram.observe(value)
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, Labels, float]]]) -> None:
+        """Register a callable yielding (name, type, labels, value) samples at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(store.items()):
+                    self._header(lines, name, kind)
+                    for labels, value in series.items():
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for labels, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        le = 'le="%g"' % bound
+                        lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{_format_labels(labels, le)} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        seen = set()
+        for collector in self._collectors:
+            for name, kind, labels, value in collector():
+                if name not in seen:
+                    seen.add(name)
+                    self._header(lines, name, kind)
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+metrics = MetricsRegistry()
+metrics.describe("http_requests_total", "Requests handled, by route and status.")
+metrics.describe("http_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS)
+metrics.describe("http_request_size_bytes", "Request body size by route.", SIZE_BUCKETS)
+metrics.describe("http_response_size_bytes", "Response body size by route.", SIZE_BUCKETS)
+metrics.describe("http_requests_in_flight", "Requests currently being handled.")
+metrics.describe("db_queries_per_request", "SQL statements executed per request.", QUERY_COUNT_BUCKETS)
+metrics.describe("db_query_seconds_per_request", "Time spent in SQL per request.", LATENCY_BUCKETS)
+metrics.describe("db_queries_total", "SQL statements executed.")
+metrics.describe("db_query_seconds_total", "Time spent executing SQL.")
+
+
+class _QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_query_stats: ContextVar[Optional[_QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Count statements and time spent on an Engine or AsyncEngine, per request and in total."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        metrics.inc("db_queries_total")
+        metrics.inc("db_query_seconds_total", value=elapsed)
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+
+def cache_collector(name: str, cache) -> Callable:
+    """Expose a ResponseCache's hit/miss/coalesced counters and size under `cache="name"`."""
+    labels = (("cache", name),)
+
+    def collect():
+        yield "response_cache_hits_total", "counter", labels, cache.hits
+        yield "response_cache_misses_total", "counter", labels, cache.misses
+        yield "response_cache_coalesced_total", "counter", labels, cache.flight.shared
+        yield "response_cache_entries", "gauge", labels, len(cache)
+        yield "response_cache_bytes", "gauge", labels, cache.size
+
+    return collect
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, sizes, in-flight count and SQL usage per route."""
+
+    def __init__(self, app, registry: MetricsRegistry = metrics, exclude: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.registry = registry
+        self.exclude = frozenset(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status = 500
+        response_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        stats = _QueryStats()
+        token = _query_stats.set(stats)
+        registry.add_gauge("http_requests_in_flight", value=1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.add_gauge("http_requests_in_flight", value=-1)
+            _query_stats.reset(token)
+
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            route_label = getattr(route, "path", None) or "unmatched"
+            labels = (("method", scope["method"]), ("route", route_label))
+            headers = dict(scope.get("headers") or ())
+            request_bytes = int(headers.get(b"content-length", b"0") or 0)
+
+            registry.inc("http_requests_total", labels + (("status", str(status)),))
+            registry.observe("http_request_duration_seconds", elapsed, labels)
+            registry.observe("http_request_size_bytes", request_bytes, labels)
+            registry.observe("http_response_size_bytes", response_bytes, labels)
+            registry.observe("db_queries_per_request", stats.count, labels)
+            registry.observe("db_query_seconds_per_request", stats.seconds, labels)
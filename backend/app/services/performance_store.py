@@ -0,0 +1,176 @@
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.state_rollup import DistrictTotals, StateRollup
+from app.services.synthetic import SyntheticGenerator
+
+# Column order matches the row layout the React app expects
+METRICS = (
+    "total_households_issued_jobcards",
+    "person_days_generated",
+    "total_expenditure",
+    "avg_work_completion_rate",
+    "total_works_completed",
+    "total_works_takenup",
+    "work_completion_rate",
+    "avg_days_per_household",
+    "women_persondays",
+    "sc_persondays",
+    "st_persondays",
+)
+EXPORT_COLUMNS = ("district_code", "state_name", "month") + METRICS
+FLOAT_METRICS = frozenset({
+    "total_expenditure",
+    "avg_work_completion_rate",
+    "work_completion_rate",
+    "avg_days_per_household",
+})
+
+DEFAULT_MONTHS = int(os.getenv("PERFORMANCE_STORE_MONTHS", "24"))
+
+
+def month_labels(count: int, today: Optional[date] = None) -> List[str]:
+    """Return the last `count` complete calendar months as YYYY-MM, oldest first."""
+    today = today or date.today()
+    year, month = today.year, today.month
+    labels = []
+    for _ in range(count):
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+        labels.append(f"{year:04d}-{month:02d}")
+    labels.reverse()
+    return labels
+
+
+class PerformanceStore:
+    """Columnar monthly metrics: one (district, month) array per metric."""
+
+    def __init__(self, districts: Iterable[dict], months: List[str],
+                 generator: Optional[SyntheticGenerator] = None):
+        districts = list(districts)
+        self.generator = generator or SyntheticGenerator()
+        self.district_codes = [d["district_code"] for d in districts]
+        self.state_names = [d["state_name"] for d in districts]
+        self.months = list(months)
+        self._index = {code: i for i, code in enumerate(self.district_codes)}
+        self._month_index = {month: i for i, month in enumerate(self.months)}
+        self.state_rollup = StateRollup(list(dict.fromkeys(self.state_names)), self.months)
+        self._row_states = np.array([self.state_rollup.state_index(name) for name in self.state_names],
+                                    dtype=np.intp)
+        self.district_totals = DistrictTotals(len(self.district_codes))
+
+        shape = (len(self.district_codes), len(self.months))
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros(shape, dtype=np.float64 if name in FLOAT_METRICS else np.int64)
+            for name in METRICS
+        }
+        self.present = np.zeros(shape, dtype=bool)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, districts: Iterable[dict], months: int = DEFAULT_MONTHS,
+              generator: Optional[SyntheticGenerator] = None) -> "PerformanceStore":
+        store = cls(districts, month_labels(months), generator)
+        store.regenerate()
+        return store
+
+    def __contains__(self, district_code: str) -> bool:
+        return district_code in self._index
+
+    def regenerate(self, district_codes: Optional[Iterable[str]] = None, months: Optional[int] = None) -> int:
+        """Fill the given districts' rows (all by default) from the synthetic generator.
+
+        Only the last `months` months are refilled when given; returns how many were.
+        """
+        codes = self.district_codes if district_codes is None else list(district_codes)
+        start = 0 if months is None else len(self.months) - min(max(months, 0), len(self.months))
+        rows = np.array([self._index[code] for code in codes], dtype=np.intp)
+        values = self.generator.generate(codes, self.months[start:])
+        self._write(rows, np.arange(start, len(self.months), dtype=np.intp), values)
+        return len(self.months) - start
+
+    def upsert(self, district_code: str, month: str, values: Dict[str, float]) -> None:
+        """Insert or replace a single district-month row; unspecified metrics keep their value."""
+        row, col = self._index[district_code], self._month_index[month]
+        block = {name: self.columns[name][row:row + 1, col:col + 1].copy() for name in METRICS}
+        for name, value in values.items():
+            block[name][0, 0] = value
+        self._write(np.array([row], dtype=np.intp), np.array([col], dtype=np.intp), block)
+
+    def _write(self, rows: np.ndarray, cols: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        cells = np.ix_(rows, cols)
+        with self._lock:
+            inserted = ~self.present[cells]
+            old = {}
+            for name in METRICS:
+                previous = self.columns[name][cells]
+                previous[inserted] = 0
+                old[name] = previous
+                self.columns[name][cells] = values[name]
+            self.present[cells] = True
+            self.state_rollup.apply(self._row_states[rows], old, values, inserted, cols)
+            self.district_totals.apply(rows, old, values, inserted)
+
+    def district_rows(self, district_code: str, months: int = 12) -> List[dict]:
+        months = min(months, len(self.months))
+        if months <= 0:
+            return []
+        row = self._index[district_code]
+        start = len(self.months) - months
+        columns = [self.columns[name][row, start:].tolist() for name in METRICS]
+        state_name = self.state_names[row]
+
+        data = []
+        for i, values in enumerate(zip(*columns)):
+            record = {"id": i + 1, "district_code": district_code, "month": self.months[start + i]}
+            record.update(zip(METRICS, values))
+            record["state_name"] = state_name
+            data.append(record)
+        return data
+
+    def iter_rows(self, district_codes: Iterable[str], start_month: Optional[str] = None,
+                  end_month: Optional[str] = None,
+                  columns: Sequence[str] = EXPORT_COLUMNS) -> Iterator[dict]:
+        """Yield rows for the districts within an inclusive YYYY-MM range, one district at a time."""
+        start = bisect_left(self.months, start_month) if start_month else 0
+        end = bisect_right(self.months, end_month) if end_month else len(self.months)
+        if start >= end:
+            return
+        metrics = [name for name in columns if name in self.columns]
+        months = self.months[start:end]
+        for code in district_codes:
+            row = self._index[code]
+            fixed = {"district_code": code, "state_name": self.state_names[row]}
+            values = [self.columns[name][row, start:end].tolist() for name in metrics]
+            for i, month in enumerate(months):
+                record = dict(fixed, month=month)
+                record.update(zip(metrics, (column[i] for column in values)))
+                yield record
+
+    def district_values(self, district_code: str, metrics: Sequence[str]) -> np.ndarray:
+        """(metric, month) float matrix for one district, NaN where no row is stored."""
+        row = self._index[district_code]
+        values = np.vstack([self.columns[name][row] for name in metrics]).astype(np.float64)
+        values[:, ~self.present[row]] = np.nan
+        return values
+
+    def month_values(self, metric: str, month: str) -> np.ndarray:
+        """One metric across all districts for a YYYY-MM month, NaN where no row is stored."""
+        col = self._month_index[month]
+        values = self.columns[metric][:, col].astype(np.float64)
+        values[~self.present[:, col]] = np.nan
+        return values
+
+    def state_rows(self, state_name: str, months: int = 12) -> List[dict]:
+        return self.state_rollup.rows(state_name, months)
+
+    def district_summary(self, district_code: str) -> dict:
+        """Totals over every stored month of one district, read from the running sums."""
+        return self.district_totals.row(self._index[district_code])
+
@@ -0,0 +1,207 @@
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.001"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "2"))
+
+# A thread whose innermost frame is in one of these modules is parked, not working
+_IDLE_MODULES = ("threading.py", "selectors.py", "queue.py")
+
+_sampler_threads = set()
+
+Stack = Tuple[str, ...]
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> Stack:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of every thread at a fixed interval.
+
+    Handlers declared with `def` run on the threadpool, so sampling all
+    threads catches them too. Work done concurrently for other requests
+    shows up in the same profile.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        _sampler_threads.add(threading.get_ident())
+        try:
+            while not self._stop.wait(self.interval):
+                self.ticks += 1
+                for ident, frame in sys._current_frames().items():
+                    if ident in _sampler_threads or frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                        continue
+                    self.stacks[_stack(frame)] += 1
+        finally:
+            _sampler_threads.discard(threading.get_ident())
+
+
+class Profile:
+    __slots__ = ("id", "method", "path", "status", "started_at", "duration", "interval", "ticks", "stacks")
+
+    def __init__(self, profile_id: str, method: str, path: str, interval: float):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.status: Optional[int] = None
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.interval = interval
+        self.ticks = 0
+        self.stacks: Counter = Counter()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": sum(self.stacks.values()),
+        }
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed `a;b;c count` format read by flamegraph.pl and speedscope."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def report(self, limit: int = 30) -> str:
+        inclusive: Counter = Counter()
+        own: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                inclusive[label] += count
+        total = sum(self.stacks.values()) or 1
+
+        lines = [
+            f"{self.method} {self.path} -> {self.status}",
+            f"duration {self.duration * 1000:.3f} ms, {self.ticks} ticks every {self.interval * 1000:g} ms, "
+            f"{sum(self.stacks.values())} busy thread samples",
+            "",
+        ]
+        for title, counter in (("own", own), ("inclusive", inclusive)):
+            lines.append(f"{'samples':>8} {'%':>6}  {title}")
+            for label, count in counter.most_common(limit):
+                lines.append(f"{count:8d} {100.0 * count / total:6.1f}  {label}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+class ProfileStore:
+    """The most recent request profiles, oldest dropped first."""
+
+    def __init__(self, keep: int = PROFILE_KEEP):
+        self.keep = keep
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            return [profile.to_dict() for profile in reversed(self._profiles.values())]
+
+
+profiles = ProfileStore()
+
+
+def profile_requested(scope) -> bool:
+    headers: Dict[bytes, bytes] = dict(scope.get("headers") or ())
+    if headers.get(b"x-profile", b"").lower() in (b"1", b"true"):
+        return True
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if query.get("profile", [""])[-1].lower() in ("1", "true"):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles opted-in requests and stores the result.
+
+    A request is profiled when it sends `X-Profile: 1` or `?profile=1`, or
+    is picked at PROFILE_SAMPLE_RATE. The response carries `X-Profile-Id`;
+    the profile is read back from /debug/profiles/{id}. Does nothing unless
+    PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, app, store: ProfileStore = profiles, enabled: bool = PROFILING_ENABLED,
+                 max_concurrent: int = PROFILE_MAX_CONCURRENT):
+        self.app = app
+        self.store = store
+        self.enabled = enabled
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or not profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+        # Past the concurrency cap the request runs unprofiled
+        if not self._slots.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(uuid.uuid4().hex, scope["method"], scope["path"], PROFILE_INTERVAL_SECONDS)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        sampler = SamplingProfiler(profile.interval)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self._slots.release()
+            profile.duration = time.perf_counter() - started
+            profile.ticks = sampler.ticks
+            profile.stacks = sampler.stacks
+            self.store.add(profile)
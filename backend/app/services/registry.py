@@ -0,0 +1,60 @@
+from types import MappingProxyType
+from typing import Iterable, List, Optional, Tuple
+
+
+class DistrictRegistry:
+    """Immutable hash indexes over the district and state reference lists.
+
+    Build a new instance and swap the reference to reload; never mutate one
+    that is already being served.
+    """
+
+    __slots__ = ("districts", "states", "by_code", "by_id", "by_state_name",
+                 "by_state_code", "state_districts")
+
+    def __init__(self, districts: Iterable[dict], states: Iterable[dict] = ()):
+        self.districts: Tuple[dict, ...] = tuple(dict(d) for d in districts)
+        states = [dict(s) for s in states]
+        known_states = {s["state_name"] for s in states}
+        for district in self.districts:
+            if district["state_name"] not in known_states:
+                known_states.add(district["state_name"])
+                states.append({"state_code": None, "state_name": district["state_name"]})
+        self.states: Tuple[dict, ...] = tuple(states)
+
+        adjacency = {s["state_name"]: [] for s in self.states}
+        for district in self.districts:
+            adjacency[district["state_name"]].append(district)
+
+        self.by_code = MappingProxyType({d["district_code"]: d for d in self.districts})
+        self.by_id = MappingProxyType({d["id"]: d for d in self.districts})
+        self.by_state_name = MappingProxyType({s["state_name"]: s for s in self.states})
+        self.by_state_code = MappingProxyType({s["state_code"]: s for s in self.states if s["state_code"]})
+        self.state_districts = MappingProxyType({name: tuple(ds) for name, ds in adjacency.items()})
+
+    def __contains__(self, district_code: str) -> bool:
+        return district_code in self.by_code
+
+    def __len__(self) -> int:
+        return len(self.districts)
+
+    def district(self, district_code: str) -> Optional[dict]:
+        return self.by_code.get(district_code)
+
+    def district_by_id(self, district_id: int) -> Optional[dict]:
+        return self.by_id.get(district_id)
+
+    def state(self, state_name: str) -> Optional[dict]:
+        return self.by_state_name.get(state_name)
+
+    def state_by_code(self, state_code: str) -> Optional[dict]:
+        return self.by_state_code.get(state_code)
+
+    def districts_in_state(self, state_name: str) -> Tuple[dict, ...]:
+        return self.state_districts.get(state_name, ())
+
+    def invalid_codes(self, district_codes: Iterable[str]) -> List[str]:
+        return [code for code in district_codes if code not in self.by_code]
+
+    def invalid_states(self, state_names: Iterable[str]) -> List[str]:
+        return [name for name in state_names if name not in self.by_state_name]
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+
+from fastapi import Request, Response
+
+from app.services.encoding import encode_json
+from app.services.single_flight import ProcessSingleFlight, SingleFlight, process_flight_from_env
+
+DEFAULT_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "tags")
+
+    def __init__(self, body: bytes, tags: Iterable[str] = ()):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.tags = frozenset(tags)
+
+
+class ResponseCache:
+    """LRU cache of encoded JSON bodies, bounded by total bytes and invalidated by tag."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES,
+                 process_flight: Optional[ProcessSingleFlight] = None):
+        self.max_bytes = max_bytes
+        self.flight = SingleFlight()
+        self.process_flight = process_flight if process_flight is not None else process_flight_from_env()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, body: bytes, tags: Iterable[str] = (),
+            generation: Optional[int] = None) -> CacheEntry:
+        entry = CacheEntry(body, tags)
+        with self._lock:
+            # Skip the store if an invalidation ran while the body was being built
+            if generation is not None and generation != self._generation:
+                return entry
+            if len(body) > self.max_bytes:
+                return entry
+            self._discard(key)
+            self._entries[key] = entry
+            self.size += len(body)
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self.size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, *tags: str) -> int:
+        with self._lock:
+            self._generation += 1
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.pop(tag, set())
+            for key in keys:
+                self._discard(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+            self.size = 0
+
+    def respond(self, request: Request, key: Hashable, build: Callable[[], Any],
+                tags: Iterable[str] = ()) -> Response:
+        """Serve `key` from the cache, building and encoding it on a miss.
+
+        Answers 304 when the request's If-None-Match carries the entry's ETag.
+        Concurrent misses on one key share a single build.
+        """
+        entry = self.get(key)
+        if entry is None:
+            entry = self.flight.do(key, lambda: self._build(key, build, tags))
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    def _build(self, key: Hashable, build: Callable[[], Any], tags: Iterable[str]) -> CacheEntry:
+        with self._lock:
+            # Another thread may have stored it between our miss and taking the flight
+            entry = self._entries.get(key)
+            generation = self._generation
+        if entry is not None:
+            return entry
+        if self.process_flight is not None:
+            body = self.process_flight.do(key, lambda: encode_json(build()))
+        else:
+            body = encode_json(build())
+        return self.put(key, body, tags, generation)
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
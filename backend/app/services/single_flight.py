@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process coalescing
+    fcntl = None
+
+# Directory for the cross-process lock and result files; empty disables it
+SINGLE_FLIGHT_DIR = os.getenv("SINGLE_FLIGHT_DIR", "")
+# Lock and result files unused for this long are removed
+SINGLE_FLIGHT_MAX_AGE_SECONDS = float(os.getenv("SINGLE_FLIGHT_MAX_AGE_SECONDS", "300"))
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs one computation per key at a time; concurrent callers share its result.
+
+    `do` coalesces threads (sync handlers on the threadpool), `ado` coalesces
+    asyncio tasks. Nothing is kept once the computation finishes.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.shared += 1
+        # A caller that gives up must not cancel the computation the others await
+        return await asyncio.shield(task)
+
+
+class ProcessSingleFlight:
+    """Coalesces identical byte-producing computations across worker processes on one host.
+
+    The first process to lock a key's file computes and stores the bytes;
+    processes queued on the lock reuse them when they were written after
+    the wait began, and compute themselves otherwise. Files unused for
+    `max_age` seconds are swept, at most once per `max_age` per process.
+    """
+
+    def __init__(self, directory: str, max_age: float = SINGLE_FLIGHT_MAX_AGE_SECONDS):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self._next_sweep = time.monotonic() + max_age
+
+    def do(self, key: Hashable, fn: Callable[[], bytes]) -> bytes:
+        try:
+            return self._do(key, fn)
+        finally:
+            if time.monotonic() >= self._next_sweep:
+                self._next_sweep = time.monotonic() + self.max_age
+                self.sweep()
+
+    def _do(self, key: Hashable, fn: Callable[[], bytes]) -> bytes:
+        path = self.directory / hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        waiting_since = time.time()
+        with open(path.with_suffix(".lock"), "a+b") as lock:
+            # Keeps a hot key's lock file out of the sweep
+            os.utime(lock.fileno())
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                body = self._read_since(path, waiting_since)
+                if body is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+                    return body
+            try:
+                body = fn()
+                staging = path.with_suffix(f".{os.getpid()}.tmp")
+                staging.write_bytes(body)
+                os.replace(staging, path)
+                return body
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def sweep(self) -> int:
+        """Remove lock, result and staging files older than `max_age`; returns how many went."""
+        cutoff = time.time() - self.max_age
+        removed = 0
+        for path in self.directory.iterdir():
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                if path.suffix == ".lock":
+                    with open(path, "a+b") as lock:
+                        try:
+                            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        except BlockingIOError:
+                            continue
+                        # A process that opened it before the unlink just computes on its own
+                        path.unlink()
+                else:
+                    path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    @staticmethod
+    def _read_since(path: Path, since: float) -> Optional[bytes]:
+        try:
+            if path.stat().st_mtime < since:
+                return None
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+
+def process_flight_from_env() -> Optional[ProcessSingleFlight]:
+    if not SINGLE_FLIGHT_DIR or fcntl is None:
+        return None
+    return ProcessSingleFlight(SINGLE_FLIGHT_DIR)
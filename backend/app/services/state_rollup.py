@@ -0,0 +1,108 @@
+from typing import Dict, List, Mapping
+
+import numpy as np
+
+# Rollup column -> district metric it sums
+ROLLUP_SOURCES = {
+    "total_households": "total_households_issued_jobcards",
+    "total_person_days": "person_days_generated",
+    "total_expenditure": "total_expenditure",
+    "total_works_completed": "total_works_completed",
+    "total_works_takenup": "total_works_takenup",
+}
+
+
+class StateRollup:
+    """State x month sums maintained from per-district row deltas."""
+
+    def __init__(self, state_names: List[str], months: List[str]):
+        self.state_names = list(state_names)
+        self.months = list(months)
+        self._index = {name: i for i, name in enumerate(self.state_names)}
+        shape = (len(self.state_names), len(self.months))
+        self.sums: Dict[str, np.ndarray] = {
+            name: np.zeros(shape, dtype=np.float64 if name == "total_expenditure" else np.int64)
+            for name in ROLLUP_SOURCES
+        }
+        self.district_counts = np.zeros(shape, dtype=np.int64)
+
+    def state_index(self, state_name: str) -> int:
+        return self._index[state_name]
+
+    def apply(self, states: np.ndarray, old: Mapping[str, np.ndarray],
+              new: Mapping[str, np.ndarray], inserted: np.ndarray, months: np.ndarray) -> None:
+        """Fold changed district cells into the rollup.
+
+        `states` gives the state index of each changed district row and
+        `months` the month columns touched; `old` and `new` are the district
+        metric blocks (rows x months) before and after the change, with `old`
+        zeroed wherever `inserted` marks a previously empty cell.
+        """
+        cells = np.ix_(states, months)
+        for name, source in ROLLUP_SOURCES.items():
+            np.add.at(self.sums[name], cells, np.asarray(new[source]) - old[source])
+        np.add.at(self.district_counts, cells, inserted.astype(np.int64))
+
+    def rows(self, state_name: str, months: int = 12) -> List[dict]:
+        months = min(months, len(self.months))
+        if months <= 0 or state_name not in self._index:
+            return []
+        state = self._index[state_name]
+        start = len(self.months) - months
+        columns = {name: values[state, start:].tolist() for name, values in self.sums.items()}
+        counts = self.district_counts[state, start:].tolist()
+
+        data = []
+        for i in range(months):
+            completed = columns["total_works_completed"][i]
+            takenup = columns["total_works_takenup"][i]
+            data.append({
+                "month": self.months[start + i],
+                "state_name": state_name,
+                "total_households": columns["total_households"][i],
+                "total_person_days": columns["total_person_days"][i],
+                "total_expenditure": columns["total_expenditure"][i],
+                "total_works_completed": completed,
+                "total_works_takenup": takenup,
+                "work_completion_rate": (completed / takenup) * 100 if takenup else 0.0,
+                "districts_count": counts[i],
+            })
+        return data
+
+
+# Summary column -> district metric it sums over every stored month
+SUMMARY_SOURCES = {
+    "total_households": "total_households_issued_jobcards",
+    "total_person_days": "person_days_generated",
+    "total_expenditure": "total_expenditure",
+    "avg_work_completion_rate": "avg_work_completion_rate",
+}
+_FLOAT_SUMMARIES = frozenset({"total_expenditure", "avg_work_completion_rate"})
+
+
+class DistrictTotals:
+    """Per-district running sums across all months, maintained from row deltas."""
+
+    def __init__(self, district_count: int):
+        self.sums: Dict[str, np.ndarray] = {
+            name: np.zeros(district_count, dtype=np.float64 if name in _FLOAT_SUMMARIES else np.int64)
+            for name in SUMMARY_SOURCES
+        }
+        self.month_counts = np.zeros(district_count, dtype=np.int64)
+
+    def apply(self, rows: np.ndarray, old: Mapping[str, np.ndarray],
+              new: Mapping[str, np.ndarray], inserted: np.ndarray) -> None:
+        """Fold changed district cells into the totals; arguments as for StateRollup.apply."""
+        for name, source in SUMMARY_SOURCES.items():
+            np.add.at(self.sums[name], rows, (np.asarray(new[source]) - old[source]).sum(axis=1))
+        np.add.at(self.month_counts, rows, inserted.sum(axis=1).astype(np.int64))
+
+    def row(self, index: int) -> dict:
+        count = int(self.month_counts[index])
+        completion = self.sums["avg_work_completion_rate"][index]
+        return {
+            "total_households": int(self.sums["total_households"][index]),
+            "total_person_days": int(self.sums["total_person_days"][index]),
+            "total_expenditure": float(self.sums["total_expenditure"][index]),
+            "avg_work_completion_rate": float(completion / count) if count else 0.0,
+        }
@@ -0,0 +1,359 @@
+import asyncio
+import contextvars
+import csv
+import json
+import logging
+import os
+import random
+import re
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", "4"))
+SYNC_MAX_ATTEMPTS = int(os.getenv("SYNC_MAX_ATTEMPTS", "3"))
+SYNC_BACKOFF_SECONDS = float(os.getenv("SYNC_BACKOFF_SECONDS", "0.5"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class DataSource(ABC):
+    """Where district performance rows are fetched from during a sync."""
+
+    @abstractmethod
+    async def fetch(self, district_code: str, months: int) -> List[dict]:
+        """The newest `months` rows of a district."""
+
+    async def close(self) -> None:
+        """Release connections held between fetches."""
+
+
+class MockSource(DataSource):
+    async def fetch(self, district_code: str, months: int) -> List[dict]:
+        from app.services.ingest import mock_performance_rows
+
+        return list(mock_performance_rows([district_code], months))
+
+
+class FileSource(DataSource):
+    """Reads `<district_code>.json`, `.ndjson` or `.csv` files from a local directory."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    async def fetch(self, district_code: str, months: int) -> List[dict]:
+        rows = await asyncio.to_thread(self._read, district_code)
+        rows.sort(key=lambda row: row["month"])
+        return rows[-months:] if months > 0 else []
+
+    def _read(self, district_code: str) -> List[dict]:
+        for suffix in (".json", ".ndjson", ".csv"):
+            path = self.directory / f"{district_code}{suffix}"
+            if not path.exists():
+                continue
+            with path.open(newline="") as f:
+                if suffix == ".json":
+                    rows = json.load(f)
+                elif suffix == ".ndjson":
+                    rows = [json.loads(line) for line in f if line.strip()]
+                else:
+                    rows = [_parse_csv_row(row) for row in csv.DictReader(f)]
+            for row in rows:
+                row.setdefault("district_code", district_code)
+            return rows
+        raise FileNotFoundError(f"No sync file for {district_code} in {self.directory}")
+
+
+def _parse_csv_row(row: dict) -> dict:
+    # CSV cells are all text; blank metric cells are left out so the stored value is kept
+    from app.services.ingest import PERFORMANCE_METRICS
+    from app.services.performance_store import FLOAT_METRICS
+
+    parsed = {}
+    for name, value in row.items():
+        if name in PERFORMANCE_METRICS:
+            value = value.strip() if value is not None else ""
+            if not value:
+                continue
+            value = float(value) if name in FLOAT_METRICS else int(value)
+        parsed[name] = value
+    return parsed
+
+
+class HttpSource(DataSource):
+    """GETs `{base_url}/{district_code}?months=N`, expecting a JSON list of rows."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self):
+        # One pooled client per event loop, so a sync of every district reuses its connections
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+            self._loop = loop
+        return self._client
+
+    async def fetch(self, district_code: str, months: int) -> List[dict]:
+        response = await self._get_client().get(f"{self.base_url}/{district_code}", params={"months": months})
+        response.raise_for_status()
+        rows = response.json()
+        for row in rows:
+            row.setdefault("district_code", district_code)
+        return rows
+
+    async def close(self) -> None:
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+
+def source_from_env() -> DataSource:
+    """SYNC_SOURCE: `mock` (default), `file:<directory>` or an http(s) base URL."""
+    spec = os.getenv("SYNC_SOURCE", "mock")
+    if spec.startswith("file:"):
+        return FileSource(spec[len("file:"):])
+    if spec.startswith(("http://", "https://")):
+        return HttpSource(spec)
+    return MockSource()
+
+
+class SyncJob:
+    def __init__(self, district_code: Optional[str], months: int, children: Iterable["SyncJob"] = ()):
+        self.id = uuid.uuid4().hex
+        self.district_code = district_code
+        self.months = months
+        self.children = list(children)
+        self.status = QUEUED
+        self.attempts = 0
+        self.inserted = 0
+        self.updated = 0
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        if self.children:
+            return all(child.finished for child in self.children)
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> dict:
+        if not self.children:
+            return {
+                "job_id": self.id,
+                "district_code": self.district_code,
+                "months": self.months,
+                "status": self.status,
+                "attempts": self.attempts,
+                "inserted": self.inserted,
+                "updated": self.updated,
+                "error": self.error,
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            }
+        return batch_dict(self.batch_record(), [child.to_dict() for child in self.children])
+
+    def batch_record(self) -> dict:
+        return {"job_id": self.id, "months": self.months, "created_at": self.created_at.isoformat(),
+                "jobs": [child.id for child in self.children]}
+
+
+def batch_dict(record: dict, children: List[dict]) -> dict:
+    """Status of a batch from its record and its district jobs' statuses."""
+    counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+    for child in children:
+        counts[child["status"]] += 1
+    if counts[QUEUED] + counts[RUNNING]:
+        status = RUNNING if counts[QUEUED] < len(children) else QUEUED
+    else:
+        status = FAILED if counts[FAILED] else SUCCEEDED
+    return {
+        "job_id": record["job_id"],
+        "district_code": None,
+        "months": record["months"],
+        "status": status,
+        "districts": len(children),
+        "progress": counts,
+        "inserted": sum(child["inserted"] for child in children),
+        "updated": sum(child["updated"] for child in children),
+        "failed": [child["district_code"] for child in children if child["status"] == FAILED],
+        "jobs": record["jobs"],
+        "created_at": record["created_at"],
+    }
+
+
+class JobStore:
+    """Job statuses as JSON files in a directory shared by the workers of one host.
+
+    Each worker runs the jobs it was sent, but any worker can answer a
+    status poll. A batch is stored as the ids of its district jobs.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def save(self, record: dict) -> None:
+        path = self.directory / f"{record['job_id']}.json"
+        staging = path.with_suffix(f".{os.getpid()}.tmp")
+        staging.write_text(json.dumps(record))
+        os.replace(staging, path)
+
+    def load(self, job_id: str) -> Optional[dict]:
+        # Job ids come from the URL; anything but a uuid4 hex would escape the directory
+        if not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            record = json.loads((self.directory / f"{job_id}.json").read_text())
+        except FileNotFoundError:
+            return None
+        if "jobs" not in record:
+            return record
+        children = [self.load(child_id) for child_id in record["jobs"]]
+        return batch_dict(record, [child for child in children if child is not None])
+
+    def delete(self, job_id: str) -> None:
+        try:
+            (self.directory / f"{job_id}.json").unlink()
+        except FileNotFoundError:
+            pass
+
+
+def job_store_from_env() -> Optional[JobStore]:
+    directory = os.getenv("SYNC_JOB_DIR", "")
+    return JobStore(directory) if directory else None
+
+
+# A handler syncs one district and returns (inserted, updated) counts
+SyncHandler = Callable[[str, int], Awaitable[tuple]]
+
+
+class SyncScheduler:
+    """Asyncio job queue drained by a bounded pool of sync workers.
+
+    Submitting a district that already has a queued or running job on this
+    worker returns that job instead of enqueueing a second one. Jobs run in
+    the worker that accepted them; without a JobStore (SYNC_JOB_DIR) their
+    ids can only be polled on that worker.
+    """
+
+    def __init__(self, handler: SyncHandler, concurrency: int = SYNC_CONCURRENCY,
+                 max_attempts: int = SYNC_MAX_ATTEMPTS, backoff: float = SYNC_BACKOFF_SECONDS,
+                 max_history: int = 1000, store: Optional[JobStore] = None):
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_history = max_history
+        self.store = store if store is not None else job_store_from_env()
+        self.jobs: "OrderedDict[str, SyncJob]" = OrderedDict()
+        self._active: Dict[str, SyncJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._active.clear()
+        # A fresh context each, so workers do not inherit (and report into) the submitting request's state
+        self._workers = [loop.create_task(self._worker(), context=contextvars.Context())
+                         for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+
+    def submit(self, district_code: str, months: int = 12) -> SyncJob:
+        self.start()
+        job = self._active.get(district_code)
+        if job is not None:
+            if job.status == QUEUED and months > job.months:
+                job.months = months
+                self._publish(job)
+            return job
+        job = SyncJob(district_code, months)
+        self._active[district_code] = job
+        self._remember(job)
+        self._queue.put_nowait(job)
+        return job
+
+    def submit_all(self, district_codes: Iterable[str], months: int = 12) -> SyncJob:
+        batch = SyncJob(None, months, [self.submit(code, months) for code in district_codes])
+        self._remember(batch)
+        return batch
+
+    def get(self, job_id: str) -> Optional[SyncJob]:
+        return self.jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """A job's status dict, from this worker or, with a JobStore, from any worker."""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.store.load(job_id) if self.store is not None else None
+
+    def _publish(self, job: SyncJob) -> None:
+        if self.store is not None:
+            self.store.save(job.batch_record() if job.children else job.to_dict())
+
+    def _remember(self, job: SyncJob) -> None:
+        self.jobs[job.id] = job
+        self._publish(job)
+        while len(self.jobs) > self.max_history:
+            oldest = next(iter(self.jobs.values()))
+            if not oldest.finished:
+                break
+            self.jobs.popitem(last=False)
+            if self.store is not None:
+                self.store.delete(oldest.id)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._active.pop(job.district_code, None)
+                self._queue.task_done()
+
+    async def _run(self, job: SyncJob) -> None:
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+        while True:
+            job.attempts += 1
+            self._publish(job)
+            try:
+                job.inserted, job.updated = await self.handler(job.district_code, job.months)
+            except Exception as exc:
+                if job.attempts >= self.max_attempts:
+                    logger.exception("Sync of %s failed after %d attempts", job.district_code, job.attempts)
+                    job.status, job.error = FAILED, str(exc) or type(exc).__name__
+                    break
+                delay = self.backoff * 2 ** (job.attempts - 1)
+                await asyncio.sleep(delay + random.uniform(0, delay))
+            else:
+                job.status, job.error = SUCCEEDED, None
+                break
+        job.finished_at = datetime.utcnow()
+        self._publish(job)
@@ -0,0 +1,122 @@
+import hashlib
+import os
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", "0"))
+
+# Relative MGNREGA demand by calendar month (peaks before the monsoon)
+SEASONALITY = np.array([1.05, 1.10, 1.20, 1.30, 1.35, 1.25, 0.90, 0.75, 0.75, 0.85, 0.90, 0.95])
+
+_MASK = (1 << 64) - 1
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    x = x + _GOLDEN
+    x = (x ^ (x >> np.uint64(30))) * _MIX1
+    x = (x ^ (x >> np.uint64(27))) * _MIX2
+    return x ^ (x >> np.uint64(31))
+
+
+def _district_key(code: str) -> int:
+    return int.from_bytes(hashlib.blake2b(code.encode(), digest_size=8).digest(), "little")
+
+
+def _month_key(month: str) -> int:
+    year, month = month[:7].split("-")
+    return int(year) * 12 + int(month) - 1
+
+
+def synthetic_districts(count: int, state_count: int = 36) -> tuple:
+    """Reference lists of `count` districts spread round-robin over up to `state_count` states."""
+    state_count = max(1, min(state_count, count))
+    states = [{"state_code": f"S{i:02d}", "state_name": f"State {i:02d}"} for i in range(state_count)]
+    districts = [{
+        "id": i + 1,
+        "district_code": f"D{i:05d}",
+        "district_name": f"District {i:05d}",
+        "state_name": states[i % state_count]["state_name"],
+    } for i in range(count)]
+    return districts, states
+
+
+class SyntheticGenerator:
+    """Deterministic monthly district figures.
+
+    Every value is a pure function of (seed, district code, month, metric),
+    so a district-month comes out the same whether it is generated alone or
+    as part of a national batch. Whole (district, month) grids are produced
+    with array operations; nothing loops per row.
+    """
+
+    def __init__(self, seed: int = SYNTHETIC_SEED):
+        self.seed = seed
+
+    def _uniform(self, districts: np.ndarray, months: np.ndarray, stream: int) -> np.ndarray:
+        key = np.uint64((self.seed * 0x9E3779B97F4A7C15 + stream * 0x632BE59BD9B4E019) & _MASK)
+        bits = _splitmix64(_splitmix64(districts[:, None] ^ key) ^ months[None, :])
+        return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+    def generate(self, district_codes: Sequence[str], months: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return the performance-store metrics as (district, month) arrays."""
+        districts = np.array([_district_key(code) for code in district_codes], dtype=np.uint64)
+        month_keys = np.array([_month_key(month) for month in months], dtype=np.uint64)
+        no_month = np.zeros(1, dtype=np.uint64)
+
+        def uniform(stream, low, high, per_month=True):
+            u = self._uniform(districts, month_keys if per_month else no_month, stream)
+            return low + (high - low) * u
+
+        # District-level traits that stay stable month to month
+        size = uniform(1, 5000, 25000, per_month=False)
+        intensity = uniform(2, 10, 20, per_month=False)
+        season = SEASONALITY[(month_keys % np.uint64(12)).astype(np.intp)][None, :]
+
+        households = np.maximum(1, size * uniform(3, 0.9, 1.1)).astype(np.int64)
+        person_days = (households * intensity * season * uniform(4, 0.85, 1.15)).astype(np.int64)
+        works_completed = (uniform(5, 100, 500) * season).astype(np.int64)
+        works_takenup = works_completed + uniform(6, 20, 100).astype(np.int64)
+        wage = uniform(7, 200, 300)
+
+        return {
+            "total_households_issued_jobcards": households,
+            "person_days_generated": person_days,
+            "total_expenditure": person_days * wage,
+            "avg_work_completion_rate": uniform(8, 60, 95),
+            "total_works_completed": works_completed,
+            "total_works_takenup": works_takenup,
+            "work_completion_rate": works_completed / works_takenup * 100,
+            "avg_days_per_household": person_days / households,
+            "women_persondays": (person_days * uniform(9, 0.4, 0.6)).astype(np.int64),
+            "sc_persondays": (person_days * uniform(10, 0.15, 0.25)).astype(np.int64),
+            "st_persondays": (person_days * uniform(11, 0.05, 0.15)).astype(np.int64),
+        }
+
+    def iter_rows(self, district_codes: Sequence[str], months: Sequence[str],
+                  chunk_districts: int = 500) -> Iterator[dict]:
+        """Yield `district_performances` rows, generating `chunk_districts` districts at a time."""
+        months = list(months)
+        for start in range(0, len(district_codes), chunk_districts):
+            codes = list(district_codes[start:start + chunk_districts])
+            values = self.generate(codes, months)
+            columns = {
+                "total_households": values["total_households_issued_jobcards"].tolist(),
+                "total_person_days": values["person_days_generated"].tolist(),
+                "total_expenditure": values["total_expenditure"].tolist(),
+                "avg_work_completion_rate": values["avg_work_completion_rate"].tolist(),
+                "works_completed": values["total_works_completed"].tolist(),
+                "works_ongoing": (values["total_works_takenup"] - values["total_works_completed"]).tolist(),
+            }
+            for d, code in enumerate(codes):
+                for m, month in enumerate(months):
+                    row = {"district_code": code, "month": month}
+                    for name, column in columns.items():
+                        row[name] = column[d][m]
+                    yield row
+
+    def rows(self, district_codes: Sequence[str], months: Sequence[str]) -> List[dict]:
+        return list(self.iter_rows(district_codes, months))
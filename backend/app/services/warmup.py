@@ -0,0 +1,60 @@
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+# Comma-separated paths to request once at startup; empty uses the app's defaults
+WARMUP_PATHS = [path.strip() for path in os.getenv("WARMUP_PATHS", "").split(",") if path.strip()]
+
+
+class Readiness:
+    """Whether this worker has finished warming up and is not shutting down."""
+
+    def __init__(self):
+        self.ready = False
+        self.stopping = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.results: Dict[str, object] = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "status": "stopping" if self.stopping else "ready" if self.ready else "starting",
+            "warmup_seconds": round(self.finished_at - self.started_at, 3)
+            if self.started_at is not None and self.finished_at is not None else None,
+            "warmup": self.results,
+        }
+
+
+async def warm_paths(app, paths: Iterable[str]) -> Dict[str, object]:
+    """GET each path in-process through the full middleware stack; returns status codes or errors."""
+    try:
+        import httpx
+    except ImportError:
+        logger.warning("httpx is not installed; skipping request warm-up")
+        return {}
+
+    results: Dict[str, object] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+        for path in paths:
+            try:
+                response = await client.get(path)
+                results[path] = response.status_code
+            except Exception as exc:
+                logger.exception("Warm-up request to %s failed", path)
+                results[path] = f"error: {exc}"
+    return results
+
+
+async def warm_up(app, readiness: Readiness, default_paths: List[str]) -> None:
+    """Warm the app, then mark it ready; meant to run as a task beside the serving worker."""
+    readiness.started_at = time.perf_counter()
+    if WARMUP_ENABLED:
+        readiness.results = await warm_paths(app, WARMUP_PATHS or default_paths)
+    readiness.finished_at = time.perf_counter()
+    readiness.ready = True
+    logger.info("Warm-up finished in %.3fs", readiness.finished_at - readiness.started_at)
@@ -0,0 +1,32 @@
+"""Move closed months of performance data from the database into the Parquet archive.
+
+    ARCHIVE_DIR=./data/archive python archive_data.py
+    python archive_data.py --archive-dir /srv/archive --keep-months 36
+
+Months older than the last --keep-months stay readable through
+/performance, /compare and the export endpoint, which read the archive
+when ARCHIVE_DIR is set.
+"""
+import argparse
+import asyncio
+import time
+from app.database.database import AsyncSessionLocal, init_db
+from app.services.archive import ARCHIVE_DIR, ARCHIVE_KEEP_MONTHS, PerformanceArchive, archive_closed_months
+
+async def archive(directory: str, keep_months: int):
+    await init_db()
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        moved = await archive_closed_months(db, PerformanceArchive(directory), keep_months)
+    print(f"{moved} rows archived to {directory} in {time.perf_counter() - started:.1f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR or "./data/archive", help="archive root directory")
+    parser.add_argument("--keep-months", type=int, default=ARCHIVE_KEEP_MONTHS,
+                        help="recent months to keep in the database")
+    args = parser.parse_args(argv)
+    asyncio.run(archive(args.archive_dir, args.keep_months))
+
+if __name__ == "__main__":
+    main()
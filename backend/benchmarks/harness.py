@@ -0,0 +1,120 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class Result:
+    def __init__(self, name: str, params: dict, samples_ns: List[int], extra: Optional[dict] = None):
+        self.name = name
+        self.params = params
+        self.samples_ns = samples_ns
+        self.extra = extra or {}
+
+    @property
+    def key(self) -> str:
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.name}[{params}]"
+
+    def to_dict(self) -> dict:
+        samples = sorted(self.samples_ns)
+        ms = [s / 1e6 for s in samples]
+
+        def pct(p):
+            return ms[min(len(ms) - 1, int(round(p / 100 * (len(ms) - 1))))]
+
+        return {
+            "name": self.name,
+            "params": self.params,
+            "n": len(ms),
+            "mean_ms": statistics.fmean(ms),
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "min_ms": ms[0],
+            "max_ms": ms[-1],
+            **self.extra,
+        }
+
+
+def measure(name: str, params: dict, fn: Callable[[], object], min_time: float = 0.2,
+            min_runs: int = 5, setup: Optional[Callable[[], None]] = None) -> Result:
+    """Time `fn` repeatedly for at least `min_time` seconds after one warm-up call."""
+    if setup:
+        setup()
+    fn()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < min_runs or time.perf_counter() < deadline:
+        if setup:
+            setup()
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+    return Result(name, params, samples)
+
+
+async def measure_load(name: str, params: dict, request: Callable[[int], Awaitable[object]],
+                       total: int, concurrency: int) -> Result:
+    """Issue `total` requests from `concurrency` concurrent tasks, recording per-request latency."""
+    import asyncio
+
+    samples: List[int] = []
+    counter = iter(range(total))
+
+    async def client():
+        for i in counter:
+            start = time.perf_counter_ns()
+            await request(i)
+            samples.append(time.perf_counter_ns() - start)
+
+    await request(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return Result(name, params, samples, {"requests_per_sec": total / elapsed if elapsed else 0.0})
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: List[Result], path: str) -> dict:
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": {r.key: r.to_dict() for r in results},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def compare_results(current: dict, baseline_path: str, threshold: float = 0.10) -> List[str]:
+    """Return a line per shared benchmark whose p50 moved by more than `threshold`."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    lines = []
+    for key, result in current["results"].items():
+        before: Dict = baseline.get(key)
+        if not before or not before["p50_ms"]:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        if abs(change) > threshold:
+            label = "SLOWER" if change > 0 else "faster"
+            lines.append(f"{label:6} {change:+7.1%}  {key}  {before['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms")
+    return lines
@@ -0,0 +1,73 @@
+import os
+from typing import List, Sequence
+
+import httpx
+
+from benchmarks.harness import Result, measure_load
+
+MOCK_ENDPOINTS = {
+    "performance": "/api/districts/LKO/performance?months=12",
+    "latest": "/api/districts/LKO/latest",
+    "compare": "/api/compare?district_codes=LKO,AGR,MUM,BLR&months=6",
+    "states_compare": "/api/states/compare?state_names=Uttar Pradesh,Maharashtra,Karnataka&months=12",
+    "summary": "/api/performance/summary",
+    "districts": "/api/districts",
+}
+
+DB_ENDPOINTS = {
+    "performance": "/api/districts/LKO/performance?months=12",
+    "latest": "/api/districts/LKO/latest",
+    "compare": "/api/compare?district_codes=LKO,AGR,KNP,VNS&months=6",
+    "summary": "/api/performance/summary",
+    "districts": "/api/districts",
+}
+
+
+async def _run_endpoints(app, suite: str, endpoints: dict, total: int,
+                         concurrencies: Sequence[int], headers: dict = None) -> List[Result]:
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, url in endpoints.items():
+            async def request(_, url=url):
+                response = await client.get(url, headers=headers)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{url} returned {response.status_code}")
+                return response
+
+            for concurrency in concurrencies:
+                results.append(await measure_load(f"{suite}:{name}", {"concurrency": concurrency}, request,
+                                                  total, concurrency))
+    return results
+
+
+async def run_mock(total: int, concurrencies: Sequence[int]) -> List[Result]:
+    from app.main import app
+
+    results = await _run_endpoints(app, "load_mock", MOCK_ENDPOINTS, total, concurrencies)
+
+    # Dashboards that poll with If-None-Match get 304s from the response cache
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        etags = {name: (await client.get(url)).headers.get("etag") for name, url in MOCK_ENDPOINTS.items()}
+    for name, url in MOCK_ENDPOINTS.items():
+        if etags[name]:
+            results += await _run_endpoints(app, "load_mock_304", {name: url}, total, concurrencies,
+                                            headers={"If-None-Match": etags[name]})
+    return results
+
+
+async def run_db(total: int, concurrencies: Sequence[int]) -> List[Result]:
+    """Load-test the SQLAlchemy routers against the database in DATABASE_URL, seeded first."""
+    from fastapi import FastAPI
+
+    from app.routers import districts
+    from seed_data import seed_database
+
+    await seed_database()
+    app = FastAPI()
+    app.include_router(districts.router)
+    return await _run_endpoints(app, "load_db", DB_ENDPOINTS, total, concurrencies)
+
+
+def bench_database_url(directory: str) -> str:
+    return "sqlite:///" + os.path.join(directory, "bench.db")
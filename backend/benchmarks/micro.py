@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+from typing import List, Sequence
+
+from starlette.requests import Request
+
+from app.services.encoding import COLUMNAR_FLOAT_PRECISION
+from benchmarks.harness import Result, measure
+
+
+def scaled_reference(district_count: int):
+    """The mock district/state lists, or `district_count` synthetic districts over 36 states."""
+    import app.main as main
+    from app.services.synthetic import synthetic_districts
+
+    if district_count == len(main.districts):
+        return main.districts, main.states
+    return synthetic_districts(district_count)
+
+
+@contextmanager
+def scaled_main(district_count: int, months: int = 24):
+    """Point app.main at a registry and store of `district_count` districts for the duration."""
+    import app.main as main
+    from app.services.performance_store import PerformanceStore
+    from app.services.registry import DistrictRegistry
+
+    saved = main.registry, main.performance_store
+    districts, states = scaled_reference(district_count)
+    main.registry = DistrictRegistry(districts, states)
+    main.performance_store = PerformanceStore.build(main.registry.districts, months)
+    main.response_cache.clear()
+    try:
+        yield main
+    finally:
+        main.registry, main.performance_store = saved
+        main.response_cache.clear()
+
+
+def _request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+
+def run(district_counts: Sequence[int], month_windows: Sequence[int], min_time: float) -> List[Result]:
+    results = []
+    for count in district_counts:
+        with scaled_main(count) as main:
+            code = main.registry.districts[0]["district_code"]
+            largest_state = max(main.registry.state_districts, key=lambda s: len(main.registry.state_districts[s]))
+            compare_codes = ",".join(d["district_code"] for d in main.registry.districts[:10])
+            compare_states = ",".join(s["state_name"] for s in main.registry.states[:5])
+            clear = main.response_cache.clear
+
+            for months in month_windows:
+                params = {"districts": count, "months": months}
+                results.append(measure("generate_performance_data", params,
+                                       lambda: main.generate_performance_data(code, months), min_time))
+                results.append(measure("generate_state_data", params,
+                                       lambda: main.generate_state_data(largest_state, months), min_time))
+                results.append(measure("compare_districts", dict(params, codes=compare_codes.count(",") + 1),
+                                       lambda: main.compare_districts(_request(), compare_codes, months,
+                                                                      format="rows", precision=COLUMNAR_FLOAT_PRECISION),
+                                       min_time, setup=clear))
+                results.append(measure("compare_states", dict(params, states=compare_states.count(",") + 1),
+                                       lambda: main.compare_states(_request(), compare_states, months,
+                                                                   format="rows", precision=COLUMNAR_FLOAT_PRECISION),
+                                       min_time, setup=clear))
+
+            results.append(measure("get_performance_summary", {"districts": count},
+                                   lambda: main.get_performance_summary(_request()), min_time, setup=clear))
+    return results
@@ -0,0 +1,73 @@
+"""Offline benchmark suite for the API hot paths.
+
+    python -m benchmarks.run                      # full run, results/<timestamp>.json
+    python -m benchmarks.run --quick              # smaller matrix for a fast check
+    python -m benchmarks.run --baseline results/before.json
+
+Run from the backend directory. The SQLite router benchmarks use a
+throwaway database in a temporary directory.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller matrix and shorter timings")
+    parser.add_argument("--only", choices=["micro", "load", "db"], action="append",
+                        help="run only these suites (repeatable)")
+    parser.add_argument("--output", help="results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative p50 change to report")
+    args = parser.parse_args(argv)
+
+    suites = set(args.only or ["micro", "load", "db"])
+    tmpdir = tempfile.mkdtemp(prefix="mgnrega-bench-")
+
+    from benchmarks.load import bench_database_url
+    # Must be set before app.database is first imported
+    os.environ["DATABASE_URL"] = bench_database_url(tmpdir)
+
+    from benchmarks import harness, load, micro
+
+    if args.quick:
+        district_counts, month_windows, min_time = (13, 700), (1, 12), 0.05
+        total, concurrencies = 200, (1, 16)
+    else:
+        district_counts, month_windows, min_time = (13, 100, 700), (1, 6, 12, 24), 0.25
+        total, concurrencies = 2000, (1, 16, 64)
+
+    results = []
+    if "micro" in suites:
+        results += micro.run(district_counts, month_windows, min_time)
+    if "load" in suites:
+        results += asyncio.run(load.run_mock(total, concurrencies))
+    if "db" in suites:
+        results += asyncio.run(load.run_db(total, concurrencies))
+
+    output = args.output or os.path.join(BENCH_DIR, "results", datetime.utcnow().strftime("%Y%m%dT%H%M%S") + ".json")
+    report = harness.save_results(results, output)
+
+    for key, result in report["results"].items():
+        line = f"{key:70} p50 {result['p50_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms"
+        if "requests_per_sec" in result:
+            line += f"  {result['requests_per_sec']:9.0f} req/s"
+        print(line)
+    print(f"\nSaved {len(results)} results to {output}")
+
+    if args.baseline:
+        changes = harness.compare_results(report, args.baseline, args.threshold)
+        print(f"\nCompared with {args.baseline}:")
+        print("\n".join(changes) if changes else f"no p50 changes above {args.threshold:.0%}")
+        return 1 if any(line.startswith("SLOWER") for line in changes) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,104 @@
-import sys
+"""Production server: preloaded app, several uvicorn workers under gunicorn.
+
+    python start.py                       # WEB_CONCURRENCY workers on :8000
+    python start.py --workers 8 --port 9000
+
+The app is imported once in the master before forking, so the district
+registry, performance store and response cache setup are shared
+copy-on-write by every worker. Seed the database separately with
+`python seed_data.py`; use `python run.py` for auto-reload in development.
+
+Graceful restarts (send to the master pid):
+
+    kill -HUP  <pid>    replace workers one generation at a time, same code
+    kill -USR2 <pid>    start a new master on new code, then
+    kill -WINCH <old>   drain the old workers and kill -QUIT <old>
+"""
+import argparse
+import gc
 import os
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import sys
+
+APP_MODULE = os.getenv("APP_MODULE", "app.main:app")
+UVICORN_LOOP = os.getenv("UVICORN_LOOP", "auto")  # uvloop when installed
+UVICORN_HTTP = os.getenv("UVICORN_HTTP", "auto")  # httptools when installed
+
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # gunicorn is not available, e.g. on Windows
+    UvicornWorker = None
+else:
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": UVICORN_LOOP, "http": UVICORN_HTTP}
+
+
+def pre_fork(server, worker):
+    # Move everything built so far out of the GC's reach so collections in a
+    # worker do not write to (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    database = sys.modules.get("app.database.database")
+    if database is not None:
+        # Pooled connections opened before the fork belong to the master
+        database.engine.sync_engine.dispose(close=False)
+
+
+def options_from_env(args) -> dict:
+    return {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "start.Worker",
+        "preload_app": os.getenv("PRELOAD_APP", "true").lower() == "true",
+        "graceful_timeout": int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        "timeout": int(os.getenv("WORKER_TIMEOUT", "60")),
+        "keepalive": int(os.getenv("KEEPALIVE", "5")),
+        # Recycle workers after this many requests (0 disables), staggered by the jitter
+        "max_requests": int(os.getenv("MAX_REQUESTS", "0")),
+        "max_requests_jitter": int(os.getenv("MAX_REQUESTS_JITTER", "0")),
+        "pre_fork": pre_fork,
+        "post_fork": post_fork,
+        "accesslog": os.getenv("ACCESS_LOG") or None,
+    }
+
+
+def serve_gunicorn(options: dict) -> None:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.importer import import_from_string
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return import_from_string(APP_MODULE)
+
+    Server().run()
+
+
+def serve_uvicorn(args) -> None:
+    # No gunicorn (e.g. on Windows): uvicorn's own supervisor, without preloading
+    import uvicorn
+
+    uvicorn.run(APP_MODULE, host=args.host, port=args.port, workers=args.workers,
+                loop=UVICORN_LOOP, http=UVICORN_HTTP)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    args = parser.parse_args(argv)
+
+    if UvicornWorker is None:
+        serve_uvicorn(args)
+    else:
+        serve_gunicorn(options_from_env(args))
 
-from seed_data import seed_data
-import uvicorn
 
 if __name__ == "__main__":
-    print("Seeding database...")
-    seed_data()
-    print("Starting server...")
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    main()